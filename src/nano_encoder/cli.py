@@ -2,6 +2,10 @@ import argparse
 from pathlib import Path
 
 from nano_encoder import __version__
+from nano_encoder.commands.healthcheck import DEFAULT_HASH_PREFILTER_DISTANCE
+from nano_encoder.commands.healthcheck import DEFAULT_JOBS as DEFAULT_HEALTH_JOBS
+from nano_encoder.commands.optimize import DEFAULT_JOBS as DEFAULT_OPTIMIZE_JOBS
+from nano_encoder.utils import DEFAULT_SCAN_WORKERS
 
 CRF_MIN: int = 0
 CRF_MAX: int = 51
@@ -19,6 +23,32 @@ def valid_crf_range(value: str) -> int:
     return int_value
 
 
+def positive_int(value: str) -> int:
+    """Validate arguments which must be a whole number of at least 1 (worker counts, etc.)."""
+    if not value.isdigit() or int(value) < 1:
+        msg = f"{value} must be a whole number of at least 1"
+        raise argparse.ArgumentTypeError(msg)
+    return int(value)
+
+
+def non_negative_int(value: str) -> int:
+    """Validate arguments which must be a whole number of at least 0 (distances, etc.)."""
+    if not value.isdigit():
+        msg = f"{value} must be a whole number of at least 0"
+        raise argparse.ArgumentTypeError(msg)
+    return int(value)
+
+
+def add_scan_workers_argument(parser: argparse.ArgumentParser) -> None:
+    """Add the '--scan-workers' option shared by commands which scan a directory tree."""
+    parser.add_argument(
+        "--scan-workers",
+        type=positive_int,
+        default=DEFAULT_SCAN_WORKERS,
+        help="Number of directories to scan concurrently, 1 to scan serially (default: 4x CPU cores, max 32)",
+    )
+
+
 def create_parser() -> argparse.ArgumentParser:
     """Create the primary argument parser."""
     primary_parser = argparse.ArgumentParser(
@@ -104,6 +134,19 @@ def add_optimize_parser(subparsers: argparse._SubParsersAction) -> None:
         dest="replace_after",
         help="Replace the original video file with the optimized version (recycle original; remove '.optimized' tag)",
     )
+    optimize_parser.add_argument(
+        "--jobs",
+        "-j",
+        type=positive_int,
+        default=DEFAULT_OPTIMIZE_JOBS,
+        help="Number of videos to encode at the same time (default: %(default)s)",
+    )
+    optimize_parser.add_argument(
+        "--threads-per-job",
+        type=positive_int,
+        help="Number of CPU threads each encode may use (default: all threads, split evenly between jobs)",
+    )
+    add_scan_workers_argument(optimize_parser)
 
 
 def add_purge_parser(subparsers: argparse._SubParsersAction) -> None:
@@ -127,6 +170,7 @@ def add_purge_parser(subparsers: argparse._SubParsersAction) -> None:
         dest="skip_confirmation",
         help="Skip confirmation when purging original files (DANGEROUS!)",
     )
+    add_scan_workers_argument(purge_parser)
 
 
 def add_health_parser(subparsers: argparse._SubParsersAction) -> None:
@@ -151,6 +195,40 @@ def add_health_parser(subparsers: argparse._SubParsersAction) -> None:
         action="store_true",
         help="Check all video pairs rather than a sample",
     )
+    health_check_parser.add_argument(
+        "--fast",
+        action="store_true",
+        help="Compare 2 frames per second at 640px wide, for a quicker (approximate) score",
+    )
+    health_check_parser.add_argument(
+        "--hash-prefilter",
+        type=non_negative_int,
+        nargs="?",
+        const=DEFAULT_HASH_PREFILTER_DISTANCE,
+        metavar="MAX_DISTANCE",
+        help="Skip SSIM for pairs whose sampled frames hash within MAX_DISTANCE bits of each other "
+        f"(default distance: {DEFAULT_HASH_PREFILTER_DISTANCE})",
+    )
+    health_check_parser.add_argument(
+        "--jobs",
+        "-j",
+        type=positive_int,
+        default=DEFAULT_HEALTH_JOBS,
+        help="Number of video pairs to compare at the same time (default: 1 per 4 CPU cores)",
+    )
+    health_check_parser.add_argument(
+        "--no-cache",
+        dest="use_cache",
+        action="store_false",
+        help="Re-run SSIM for every pair, rather than reusing scores of unchanged pairs from earlier health checks",
+    )
+    health_check_parser.add_argument(
+        "--no-hwaccel",
+        dest="hwaccel",
+        action="store_false",
+        help="Decode videos on the CPU only, rather than letting FFmpeg use hardware decoding when available",
+    )
+    add_scan_workers_argument(health_check_parser)
 
 
 def add_untag_parser(subparsers: argparse._SubParsersAction) -> None:
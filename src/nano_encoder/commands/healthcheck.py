@@ -1,10 +1,19 @@
 import argparse
+import bisect
+import collections
 import math
+import os
 import random
 import re
+import shutil
+import sqlite3
 import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from pathlib import Path
+from typing import TextIO
 
 from rich import box
 from rich.progress import (
@@ -19,8 +28,17 @@ from rich.table import Table
 from rich.text import Text
 
 from nano_encoder.console import console
-from nano_encoder.logger import FFMPEG_LOG_FILE, logger
-from nano_encoder.utils import find_all_video_files, get_video_resolution, has_optimized_version, humanize_file_size
+from nano_encoder.logger import FFMPEG_LOG_FILE, LOG_DIR, logger
+from nano_encoder.utils import (
+    DEFAULT_SCAN_WORKERS,
+    VideoScan,
+    executable_path,
+    get_frame_hashes,
+    get_video_duration,
+    get_video_resolution,
+    humanize_file_size,
+    scan_video_files,
+)
 
 from .base_command import BaseCommand
 
@@ -29,7 +47,18 @@ DEFAULT_SAMPLE_RATIO = 0.05
 MINIMUM_SAMPLE_SIZE = 1
 SSIM_EXCELLENT_THRESHOLD = 0.990
 SSIM_GOOD_THRESHOLD = 0.980
-FFMPEG_SSIM_PATTERN = r"All:(\d+\.\d+)"
+SSIM_HEALTH_THRESHOLDS = (SSIM_GOOD_THRESHOLD, SSIM_EXCELLENT_THRESHOLD)
+SSIM_HEALTH_COLORS = ("red", "yellow", "green")  # Below, between and above the thresholds
+FFMPEG_SSIM_PATTERN = re.compile(r"\[Parsed_ssim_(\d+) @ [^\]]*\] SSIM .*?All:(\d+\.\d+)")
+SSIM_BATCH_SIZE = 8
+SSIM_TIMEOUT_PER_PAIR = 300  # 5 minutes, for very large files
+SSIM_ERROR_CONTEXT_LINES = 10  # Last lines of ffmpeg's report kept for the error log
+FRAME_HASH_SAMPLES = 5
+DEFAULT_HASH_PREFILTER_DISTANCE = 2
+FAST_SSIM_FILTERS = "fps=2,scale=640:-2"  # Fewer, smaller frames, for a quick estimate
+SSIM_THREADS_PER_JOB = 4
+DEFAULT_JOBS = max(1, (os.cpu_count() or 1) // SSIM_THREADS_PER_JOB)
+SSIM_CACHE_FILE = LOG_DIR / "NanoEncoder_ssim_cache.sqlite3"
 
 
 @dataclass
@@ -41,12 +70,24 @@ class HealthArgs:
         directory: Directory containing video pairs to analyze
         sample_ratio: Fraction of video pairs to sample for analysis (0.0-1.0)
         all: Whether to analyze all video pairs instead of sampling
+        fast: Whether to compare fewer, downscaled frames for a quicker estimate
+        hash_prefilter: Largest frame hash distance that skips SSIM analysis, None to always run it
+        jobs: Number of video pairs to compare at the same time
+        scan_workers: Number of directories to scan concurrently when looking for video pairs
+        use_cache: Whether to reuse SSIM scores of unchanged pairs from previous health checks
+        hwaccel: Whether to let ffmpeg decode with hardware acceleration, when available
 
     """
 
     directory: Path
     sample_ratio: float = DEFAULT_SAMPLE_RATIO
     all: bool = False
+    fast: bool = False
+    hash_prefilter: int | None = None
+    jobs: int = DEFAULT_JOBS
+    scan_workers: int = DEFAULT_SCAN_WORKERS
+    use_cache: bool = True
+    hwaccel: bool = True
 
 
 def handle_health_command(args: argparse.Namespace) -> None:
@@ -66,6 +107,12 @@ def handle_health_command(args: argparse.Namespace) -> None:
         directory=args.directory,
         sample_ratio=args.sample_ratio,
         all=args.all,
+        fast=args.fast,
+        hash_prefilter=args.hash_prefilter,
+        jobs=args.jobs,
+        scan_workers=args.scan_workers,
+        use_cache=args.use_cache,
+        hwaccel=args.hwaccel,
     )
 
     try:
@@ -80,6 +127,94 @@ def handle_health_command(args: argparse.Namespace) -> None:
         raise
 
 
+class SsimCache:
+    """
+    SSIM scores from previous health checks, stored in SQLite.
+
+    Scores are stored per pair and comparison mode, together with the size and modification time of both
+    files. A score is only reused while neither file has changed since it was measured.
+    """
+
+    def __init__(self, path: Path) -> None:
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path: Path to the SQLite database file
+
+        """
+        # Workers record scores concurrently, the lock serializes access to the shared connection
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS ssim_scores ("
+            "original TEXT, optimized TEXT, fast INTEGER, signature TEXT, score REAL, "
+            "PRIMARY KEY (original, optimized, fast))",
+        )
+
+    @staticmethod
+    def signature(original_stat: os.stat_result, optimized_stat: os.stat_result) -> str:
+        """Describe the current version of both files, by size and modification time."""
+        return (
+            f"{original_stat.st_size}:{original_stat.st_mtime_ns}:{optimized_stat.st_size}:{optimized_stat.st_mtime_ns}"
+        )
+
+    def get(self, original: Path, optimized: Path, *, fast: bool, signature: str) -> float | None:
+        """Return the cached score of a pair, if it was measured for the same version of both files."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT score FROM ssim_scores WHERE original = ? AND optimized = ? AND fast = ? AND signature = ?",
+                (str(original), str(optimized), fast, signature),
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, original: Path, optimized: Path, *, fast: bool, signature: str, score: float) -> None:
+        """Store the score of a pair, replacing any score of an older version."""
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO ssim_scores VALUES (?, ?, ?, ?, ?)",
+                (str(original), str(optimized), fast, signature, score),
+            )
+
+    def close(self) -> None:
+        """Save new scores and close the database."""
+        with self._lock:
+            self._connection.commit()
+            self._connection.close()
+
+
+def build_ssim_filtergraph(pair_count: int, *, fast: bool) -> tuple[str, list[int]]:
+    """
+    Build a filtergraph comparing pair_count video pairs, with one ssim filter per pair.
+
+    Inputs are expected in pair order, original first: pair i uses inputs 2i and 2i + 1.
+    In fast mode, both videos of a pair are decimated and downscaled before the ssim filter.
+
+    Args:
+        pair_count: Number of video pairs to compare
+        fast: Whether to compare fewer, downscaled frames
+
+    Returns:
+        tuple[str, list[int]]: The filtergraph, and the index of each pair's ssim filter, in pair order
+
+    """
+    if fast:
+        chains = [
+            f"[{2 * i}:v]{FAST_SSIM_FILTERS}[original{i}];"
+            f"[{2 * i + 1}:v]{FAST_SSIM_FILTERS}[optimized{i}];"
+            f"[original{i}][optimized{i}]ssim"
+            for i in range(pair_count)
+        ]
+        filters_per_pair = 2 * len(FAST_SSIM_FILTERS.split(",")) + 1
+    else:
+        chains = [f"[{2 * i}:v][{2 * i + 1}:v]ssim" for i in range(pair_count)]
+        filters_per_pair = 1
+
+    # ffmpeg numbers filters in the order they're parsed, and each pair's ssim filter comes last in its chain
+    ssim_filter_indexes = [(i + 1) * filters_per_pair - 1 for i in range(pair_count)]
+    return ";".join(chains), ssim_filter_indexes
+
+
 class HealthChecker(BaseCommand):
     """
     Analyzes video quality and compression efficiency through SSIM comparison.
@@ -114,10 +249,22 @@ class HealthChecker(BaseCommand):
         # Analysis configuration
         self.sample_ratio = args.sample_ratio
         self.process_all = args.all
+        self.fast = args.fast
+        self.hash_prefilter = args.hash_prefilter
+        self.jobs = args.jobs
+        self.scan_workers = args.scan_workers
+        self.hwaccel = args.hwaccel
+
+        # Split the cores between concurrent comparisons, rather than every ffmpeg claiming all of them
+        self.ffmpeg_threads = max(1, (os.cpu_count() or 1) // self.jobs) if self.jobs > 1 else None
 
-        # Results tracking
+        # Results tracking, workers add rows and append to the ffmpeg log concurrently
+        self.video_scan = self._scan()
         self.sample = self._get_sample()
         self.health_table = self._create_results_table()
+        self._table_lock = threading.Lock()
+        self._log_lock = threading.Lock()
+        self.ssim_cache = SsimCache(SSIM_CACHE_FILE) if args.use_cache else None
 
     def _create_results_table(self) -> Table:
         """
@@ -137,21 +284,41 @@ class HealthChecker(BaseCommand):
 
     def execute(self) -> None:
         """Execute comprehensive health check analysis."""
+        try:
+            self._analyze_sample()
+        finally:
+            if self.ssim_cache:
+                self.ssim_cache.close()
+
+    def _analyze_sample(self) -> None:
+        """Compare every sampled pair and display the results."""
         if not self.sample:
             console.print("No video pairs found for health check analysis.")
             return
 
         logger.info(f"Starting health check for {len(self.sample)} video pair(s)")
 
-        with self.ProgressBar as progress:
+        # The ffmpeg log is opened once for the whole run, every comparison appends its report to it
+        with self.ProgressBar as progress, FFMPEG_LOG_FILE.open("a", encoding="utf-8") as ffmpeg_log:
             overall_progress_id = progress.add_task(
                 f"Analyzing video quality for [blue]{self.directory.name}[/]",
                 total=len(self.sample),
             )
 
-            for original_video, optimized_video in self.sample:
-                self._check_video_pair(original_video, optimized_video)
-                progress.update(overall_progress_id, advance=1)
+            # Pairs scored by an earlier health check don't need ffmpeg again
+            pending_pairs = [pair for pair in self.sample if not self._add_cached_row(*pair)]
+            progress.update(overall_progress_id, advance=len(self.sample) - len(pending_pairs))
+
+            batches = self._batch_pairs(pending_pairs)
+            with ThreadPoolExecutor(max_workers=max(1, min(self.jobs, len(batches)))) as executor:
+                futures = {executor.submit(self._check_video_batch, batch, ffmpeg_log): batch for batch in batches}
+                try:
+                    for future in as_completed(futures):
+                        future.result()
+                        progress.update(overall_progress_id, advance=len(futures[future]))
+                finally:
+                    for future in futures:
+                        future.cancel()
 
             progress.update(
                 overall_progress_id,
@@ -166,44 +333,180 @@ class HealthChecker(BaseCommand):
         console.print(self.health_table)
         console.print()
 
-    def _check_video_pair(self, original_video: Path, optimized_video: Path) -> None:
+    def _batch_pairs(self, pairs: list[tuple[Path, Path]]) -> list[list[tuple[Path, Path]]]:
         """
-        Compare an original-optimized video pair using SSIM analysis.
+        Split pairs into batches, each compared by a single ffmpeg process.
+
+        Batches are kept small enough that every job gets work, and no larger than SSIM_BATCH_SIZE.
+
+        Args:
+            pairs: (original, optimized) video file pairs to compare
+
+        Returns:
+            list[list[tuple[Path, Path]]]: The pairs, in batches
+
+        """
+        batch_size = max(1, min(SSIM_BATCH_SIZE, math.ceil(len(pairs) / self.jobs)))
+        return [pairs[i : i + batch_size] for i in range(0, len(pairs), batch_size)]
+
+    def _cache_signature(self, original_video: Path, optimized_video: Path) -> str:
+        """Describe the current version of a pair, for the SSIM cache."""
+        return SsimCache.signature(self.video_scan.stat(original_video), self.video_scan.stat(optimized_video))
+
+    def _add_cached_row(self, original_video: Path, optimized_video: Path) -> bool:
+        """
+        Add a table row from the SSIM cache, if this version of the pair was scored before.
 
         Args:
             original_video: Path to the original video file
             optimized_video: Path to the optimized video file
 
+        Returns:
+            bool: True if a cached score was found and added
+
         """
-        pair_description = f"'{original_video.name}' & '{optimized_video.name}'"
-        size_diff = optimized_video.stat().st_size - original_video.stat().st_size
-        size_diff_text = self._format_size_difference(size_diff)
+        if not self.ssim_cache:
+            return False
 
-        # Handle resolution mismatch case
-        if not self._is_same_resolution(original_video, optimized_video):
-            self._add_resolution_mismatch_row(original_video, optimized_video)
-            return
+        signature = self._cache_signature(original_video, optimized_video)
+        ssim_score = self.ssim_cache.get(original_video, optimized_video, fast=self.fast, signature=signature)
+        if ssim_score is None:
+            return False
+
+        logger.info(f"Using cached SSIM score for '{original_video.name}' & '{optimized_video.name}'")
+        self._add_ssim_row(original_video, optimized_video, ssim_score)
+        return True
+
+    def _cache_ssim_score(self, original_video: Path, optimized_video: Path, ssim_score: float) -> None:
+        """Store a measured SSIM score, so later health checks can skip this pair while it's unchanged."""
+        if self.ssim_cache:
+            signature = self._cache_signature(original_video, optimized_video)
+            self.ssim_cache.set(original_video, optimized_video, fast=self.fast, signature=signature, score=ssim_score)
+
+    def _check_video_batch(self, pairs: list[tuple[Path, Path]], ffmpeg_log: TextIO) -> None:
+        """
+        Compare a batch of original-optimized video pairs using SSIM analysis.
+
+        Pairs with matching resolutions share one ffmpeg process. If that fails, the pairs are
+        compared one at a time, so a single unreadable video only costs its own result. With the
+        hash prefilter on, pairs whose sampled frames already look alike skip SSIM analysis.
+
+        Args:
+            pairs: (original, optimized) video file pairs to compare
+            ffmpeg_log: Open ffmpeg log file, for the comparison reports
+
+        """
+        comparable_pairs = []
+        for original_video, optimized_video in pairs:
+            if not self._is_same_resolution(original_video, optimized_video):
+                self._add_resolution_mismatch_row(original_video, optimized_video)
+            elif self.hash_prefilter is not None and self._frames_match(original_video, optimized_video):
+                continue
+            else:
+                comparable_pairs.append((original_video, optimized_video))
+
+        if len(comparable_pairs) > 1:
+            logger.info(f"Starting batched SSIM comparison for {len(comparable_pairs)} video pair(s)")
+            try:
+                ssim_scores = self._compare_videos_ssim(comparable_pairs, ffmpeg_log)
+            except (subprocess.CalledProcessError, ValueError) as e:
+                logger.warning(f"Batched SSIM comparison failed, comparing pairs individually: {e}")
+            else:
+                for (original_video, optimized_video), ssim_score in zip(comparable_pairs, ssim_scores, strict=True):
+                    self._cache_ssim_score(original_video, optimized_video, ssim_score)
+                    self._add_ssim_row(original_video, optimized_video, ssim_score)
+                return
+
+        for original_video, optimized_video in comparable_pairs:
+            self._check_video_pair(original_video, optimized_video, ffmpeg_log)
+
+    def _check_video_pair(self, original_video: Path, optimized_video: Path, ffmpeg_log: TextIO) -> None:
+        """
+        Compare a single original-optimized video pair using SSIM analysis.
+
+        Args:
+            original_video: Path to the original video file
+            optimized_video: Path to the optimized video file
+            ffmpeg_log: Open ffmpeg log file, for the comparison report
+
+        """
+        pair_description = f"'{original_video.name}' & '{optimized_video.name}'"
 
-        # Perform SSIM comparison
         logger.info(f"Starting SSIM comparison for {pair_description}")
         try:
-            ssim_score = self._compare_videos_ssim(original_video, optimized_video)
-            logger.info(f"{pair_description} SSIM score: {ssim_score:.3f}")
-
-            health_color = self._ssim_health_color(ssim_score)
-            row_style = "red" if size_diff >= 0 else health_color
-
-            self.health_table.add_row(
-                Text(original_video.name),
-                Text(optimized_video.name),
-                Text(str(round(ssim_score, 3))),
-                Text(size_diff_text),
-                style=row_style,
-            )
+            [ssim_score] = self._compare_videos_ssim([(original_video, optimized_video)], ffmpeg_log)
+            self._cache_ssim_score(original_video, optimized_video, ssim_score)
+            self._add_ssim_row(original_video, optimized_video, ssim_score)
         except (subprocess.CalledProcessError, ValueError) as e:
             logger.error(f"Failed to analyze {pair_description}: {e}")
             self._add_error_row(original_video, optimized_video, "Analysis failed")
 
+    def _frames_match(self, original_video: Path, optimized_video: Path) -> bool:
+        """
+        Compare the frame hashes of a video pair at evenly spaced timestamps, adding a row if they match.
+
+        Args:
+            original_video: Path to the original video file
+            optimized_video: Path to the optimized video file
+
+        Returns:
+            bool: True if every sampled frame pair is within the prefilter distance
+
+        """
+        pair_description = f"'{original_video.name}' & '{optimized_video.name}'"
+        try:
+            duration = get_video_duration(original_video)
+            timestamps = [duration * (i + 0.5) / FRAME_HASH_SAMPLES for i in range(FRAME_HASH_SAMPLES)]
+            distance = max(
+                (original_hash ^ optimized_hash).bit_count()
+                for original_hash, optimized_hash in zip(
+                    get_frame_hashes(original_video, timestamps),
+                    get_frame_hashes(optimized_video, timestamps),
+                    strict=True,
+                )
+            )
+        except (subprocess.CalledProcessError, ValueError) as e:
+            logger.warning(f"Failed to hash frames of {pair_description}, falling back to SSIM: {e}")
+            return False
+
+        logger.info(f"{pair_description} frame hash distance: {distance}")
+        if self.hash_prefilter is None or distance > self.hash_prefilter:
+            return False
+
+        size_diff = self.video_scan.stat(optimized_video).st_size - self.video_scan.stat(original_video).st_size
+        self._add_row(
+            Text(original_video.name),
+            Text(optimized_video.name),
+            Text(f"Skipped (frame hash distance {distance})"),
+            Text(self._format_size_difference(size_diff)),
+            style="red" if size_diff >= 0 else "green",
+        )
+        return True
+
+    def _add_ssim_row(self, original_video: Path, optimized_video: Path, ssim_score: float) -> None:
+        """
+        Add a table row for a compared video pair, colored by SSIM score and size change.
+
+        Args:
+            original_video: Path to the original video file
+            optimized_video: Path to the optimized video file
+            ssim_score: SSIM score of the pair
+
+        """
+        logger.info(f"'{original_video.name}' & '{optimized_video.name}' SSIM score: {ssim_score:.3f}")
+
+        size_diff = self.video_scan.stat(optimized_video).st_size - self.video_scan.stat(original_video).st_size
+        health_color = self._ssim_health_color(ssim_score)
+        row_style = "red" if size_diff >= 0 else health_color
+
+        self._add_row(
+            Text(original_video.name),
+            Text(optimized_video.name),
+            Text(str(round(ssim_score, 3))),
+            Text(self._format_size_difference(size_diff)),
+            style=row_style,
+        )
+
     def _format_size_difference(self, size_diff: int) -> str:
         """
         Format file size difference with appropriate sign.
@@ -218,9 +521,14 @@ class HealthChecker(BaseCommand):
         sign = "+" if size_diff >= 0 else "-"
         return f"{sign}{humanize_file_size(abs(size_diff))}"
 
+    def _add_row(self, *cells: Text, style: str) -> None:
+        """Add a row to the results table, safe to call from comparison workers."""
+        with self._table_lock:
+            self.health_table.add_row(*cells, style=style)
+
     def _add_resolution_mismatch_row(self, original: Path, optimized: Path) -> None:
         """Add a table row for videos with mismatched resolutions."""
-        self.health_table.add_row(
+        self._add_row(
             Text(original.name),
             Text(optimized.name),
             Text("N/A"),
@@ -230,7 +538,7 @@ class HealthChecker(BaseCommand):
 
     def _add_error_row(self, original: Path, optimized: Path, error_msg: str) -> None:
         """Add a table row for videos that failed analysis."""
-        self.health_table.add_row(
+        self._add_row(
             Text(original.name),
             Text(optimized.name),
             Text("Error"),
@@ -259,14 +567,25 @@ class HealthChecker(BaseCommand):
             return video_pairs
 
         sample_size = max(MINIMUM_SAMPLE_SIZE, math.floor(len(video_pairs) * self.sample_ratio))
-        sample = random.choices(video_pairs, k=sample_size)
+        sample = random.sample(video_pairs, k=min(sample_size, len(video_pairs)))
 
         logger.info(f"Randomly selected {len(sample)} of {len(video_pairs)} video pairs for analysis")
         return sample
 
+    def _scan(self) -> VideoScan:
+        """
+        Walk the directory once, collecting every video file by optimization tag.
+
+        Returns:
+            VideoScan: All video files found in the directory
+
+        """
+        console.print("Scanning for video pairs to analyze..", end="")
+        return scan_video_files(self.directory, self.scan_workers)
+
     def _find_video_pairs(self) -> list[tuple[Path, Path]]:
         """
-        Discover and pair original videos with their optimized counterparts.
+        Pair original videos with their optimized counterparts, resolved from the scan.
 
         Returns:
             list[tuple[Path, Path]]: List of (original, optimized) video file pairs
@@ -275,14 +594,10 @@ class HealthChecker(BaseCommand):
             FileNotFoundError: If no video pairs are found in the directory
 
         """
-        console.print("Scanning for video pairs to analyze..", end="")
-
-        original_files = find_all_video_files(self.directory, originals_only=True)
-
         pairs = [
             (original, optimized_video)
-            for original in original_files
-            if (optimized_video := has_optimized_version(original))
+            for original in sorted(self.video_scan.originals)
+            if (optimized_video := self.video_scan.optimized_version(original))
         ]
 
         if not pairs:
@@ -313,66 +628,172 @@ class HealthChecker(BaseCommand):
             logger.warning(f"Failed to compare resolutions for {video1.name} and {video2.name}: {e}")
             return False
 
-    def _compare_videos_ssim(self, original_file: Path, optimized_file: Path) -> float:
+    def _compare_videos_ssim(self, pairs: list[tuple[Path, Path]], ffmpeg_log: TextIO) -> list[float]:
         """
-        Perform SSIM (Structural Similarity Index) comparison between two videos.
+        Perform SSIM (Structural Similarity Index) comparisons between video pairs, decoding on the GPU if possible.
+
+        If ffmpeg fails with hardware decoding, the comparison is retried with software decoding.
 
         Args:
-            original_file: Path to the original video file
-            optimized_file: Path to the optimized video file
+            pairs: (original, optimized) video file pairs to compare
+            ffmpeg_log: Open ffmpeg log file, the report is appended to it
 
         Returns:
-            float: SSIM score between 0.0 and 1.0 (higher = more similar)
+            list[float]: SSIM score between 0.0 and 1.0 (higher = more similar) for each pair, in order
 
         Raises:
             subprocess.CalledProcessError: If ffmpeg command fails
-            ValueError: If SSIM score cannot be extracted from output
-
-        """
-        command = [
-            "ffmpeg",
-            "-i",
-            str(original_file),
-            "-i",
-            str(optimized_file),
-            "-lavfi",
-            "[0:v][1:v]ssim=stats_file=-",
-            "-f",
-            "null",
-            "-",
-        ]
+            ValueError: If an SSIM score cannot be extracted from output
 
+        """
+        if self.hwaccel:
+            try:
+                return self._measure_ssim(pairs, ffmpeg_log, hwaccel=True)
+            except subprocess.CalledProcessError:
+                logger.warning("SSIM comparison failed with hardware decoding, retrying with software decoding")
+        return self._measure_ssim(pairs, ffmpeg_log, hwaccel=False)
+
+    def _measure_ssim(self, pairs: list[tuple[Path, Path]], ffmpeg_log: TextIO, *, hwaccel: bool) -> list[float]:
+        """
+        Perform SSIM (Structural Similarity Index) comparisons between video pairs, in one ffmpeg process.
+
+        Each pair gets its own ssim filter in a shared filtergraph, so the batch pays for a single
+        ffmpeg startup. Each filter's summary is labelled with its index, which maps it back to its pair.
+        In fast mode, both videos of a pair are decimated and downscaled before the ssim filter.
+
+        Args:
+            pairs: (original, optimized) video file pairs to compare
+            ffmpeg_log: Open ffmpeg log file, the report is appended to it
+            hwaccel: Whether to let ffmpeg pick a hardware decoder, frames are still compared on the CPU
+
+        Returns:
+            list[float]: SSIM score between 0.0 and 1.0 (higher = more similar) for each pair, in order
+
+        Raises:
+            subprocess.CalledProcessError: If ffmpeg command fails
+            ValueError: If an SSIM score cannot be extracted from output
+
+        """
+        pair_descriptions = ", ".join(f"{original.name} & {optimized.name}" for original, optimized in pairs)
+        command, ssim_filter_indexes = self._build_ssim_command(pairs, hwaccel=hwaccel)
+
+        # Stream ffmpeg's report, picking out each filter's summary as it arrives. The report is spooled to a
+        # temporary file and appended to the log afterwards, so concurrent comparisons don't interleave
+        recent_lines: collections.deque[str] = collections.deque(maxlen=SSIM_ERROR_CONTEXT_LINES)
         try:
-            process = subprocess.run(
-                command,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.PIPE,
-                text=True,
-                check=True,
-                timeout=300,  # 5-minute timeout for very large files
-            )
-        except subprocess.TimeoutExpired as e:
-            error_msg = f"SSIM comparison timed out for {original_file.name} & {optimized_file.name}"
-            logger.error(error_msg)
-            raise ValueError(error_msg) from e
-        except (subprocess.CalledProcessError, FileNotFoundError) as e:
-            logger.error(f"Failed to compare {original_file.name} & {optimized_file.name}: {e}")
+            with (
+                tempfile.TemporaryFile("w+", encoding="utf-8") as report,
+                subprocess.Popen(
+                    command,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                    universal_newlines=True,
+                    encoding="utf-8",
+                    errors="replace",  # File names and metadata aren't guaranteed to be valid UTF-8
+                ) as process,
+            ):
+                timer, timed_out = self._start_kill_timer(process, SSIM_TIMEOUT_PER_PAIR * len(pairs))
+                try:
+                    scores = self._stream_ssim_report(process, report, recent_lines)
+                    return_code = process.wait()
+                finally:
+                    timer.cancel()
+
+                self._write_ssim_report(report, ffmpeg_log, pair_descriptions)
+        except FileNotFoundError as e:
+            logger.error(f"Failed to compare {pair_descriptions}: {e}")
             raise
 
-        # Log the detailed output for debugging
-        with FFMPEG_LOG_FILE.open("a", encoding="utf-8") as log_file:
-            log_file.write(f"\n=== SSIM Analysis: {original_file.name} vs {optimized_file.name} ===\n")
-            log_file.write(process.stderr)
-            log_file.write("\n" + "=" * 80 + "\n")
+        if timed_out.is_set():
+            error_msg = f"SSIM comparison timed out for {pair_descriptions}"
+            logger.error(error_msg)
+            raise ValueError(error_msg)
+
+        if return_code != 0:
+            error = subprocess.CalledProcessError(return_code, command, stderr="".join(recent_lines))
+            logger.error(f"Failed to compare {pair_descriptions}: {error} {error.stderr.strip()}")
+            raise error
 
-        # Extract SSIM score from stderr output
-        matches = re.findall(FFMPEG_SSIM_PATTERN, process.stderr)
-        if not matches:
+        if not scores.keys() >= set(ssim_filter_indexes):
             error_msg = "SSIM score not found in ffmpeg output"
             logger.error(f"{error_msg}. Check {FFMPEG_LOG_FILE} for details.")
             raise ValueError(error_msg)
 
-        return float(matches[-1])
+        return [scores[index] for index in ssim_filter_indexes]
+
+    def _build_ssim_command(self, pairs: list[tuple[Path, Path]], *, hwaccel: bool) -> tuple[list[str], list[int]]:
+        """
+        Build the ffmpeg command comparing all pairs in one filtergraph.
+
+        Args:
+            pairs: (original, optimized) video file pairs to compare
+            hwaccel: Whether to let ffmpeg pick a hardware decoder
+
+        Returns:
+            tuple[list[str], list[int]]: The command, and the index of each pair's ssim filter, in pair order
+
+        """
+        # Limit decoder threads when several comparisons share the machine
+        decoder_args = ["-threads", str(self.ffmpeg_threads)] if self.ffmpeg_threads else []
+        if hwaccel:
+            decoder_args += ["-hwaccel", "auto"]
+        input_args = []
+        for original_file, optimized_file in pairs:
+            input_args += [*decoder_args, "-i", str(original_file), *decoder_args, "-i", str(optimized_file)]
+
+        filtergraph, ssim_filter_indexes = build_ssim_filtergraph(len(pairs), fast=self.fast)
+        command = [executable_path("ffmpeg"), *input_args, "-lavfi", filtergraph, "-f", "null", "-"]
+        return command, ssim_filter_indexes
+
+    @staticmethod
+    def _start_kill_timer(process: subprocess.Popen[str], timeout: float) -> tuple[threading.Timer, threading.Event]:
+        """
+        Kill process if it's still running after timeout seconds.
+
+        Returns:
+            tuple[threading.Timer, threading.Event]: The started timer, to cancel once the process exits, and
+            an event that is set if the timer killed the process
+
+        """
+        timed_out = threading.Event()
+
+        def kill_on_timeout() -> None:
+            timed_out.set()
+            process.kill()
+
+        timer = threading.Timer(timeout, kill_on_timeout)
+        timer.start()
+        return timer, timed_out
+
+    @staticmethod
+    def _stream_ssim_report(
+        process: subprocess.Popen[str],
+        report: TextIO,
+        recent_lines: collections.deque[str],
+    ) -> dict[int, float]:
+        """
+        Read ffmpeg's report line by line, spooling it to report and keeping its last lines in recent_lines.
+
+        Returns:
+            dict[int, float]: SSIM score of each ssim filter that printed its summary, by filter index
+
+        """
+        scores: dict[int, float] = {}
+        if process.stderr:
+            for line in process.stderr:
+                report.write(line)
+                recent_lines.append(line)
+                if match := FFMPEG_SSIM_PATTERN.search(line):
+                    scores[int(match[1])] = float(match[2])
+        return scores
+
+    def _write_ssim_report(self, report: TextIO, ffmpeg_log: TextIO, pair_descriptions: str) -> None:
+        """Append a spooled ffmpeg report to the ffmpeg log, holding the log lock so reports don't interleave."""
+        with self._log_lock:
+            ffmpeg_log.write(f"\n=== SSIM Analysis: {pair_descriptions} ===\n")
+            report.seek(0)
+            shutil.copyfileobj(report, ffmpeg_log)
+            ffmpeg_log.write("\n" + "=" * 80 + "\n")
 
     @staticmethod
     def _ssim_health_color(score: float) -> str:
@@ -386,8 +807,4 @@ class HealthChecker(BaseCommand):
             str: Color name for Rich console formatting
 
         """
-        if score >= SSIM_EXCELLENT_THRESHOLD:
-            return "green"
-        if score >= SSIM_GOOD_THRESHOLD:
-            return "yellow"
-        return "red"
+        return SSIM_HEALTH_COLORS[bisect.bisect_right(SSIM_HEALTH_THRESHOLDS, score)]
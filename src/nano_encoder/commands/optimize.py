@@ -1,9 +1,15 @@
 import argparse
+import contextlib
+import os
+import shutil
 import subprocess
+import tempfile
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Literal
+from typing import BinaryIO, Literal
 
 from rich.progress import (
     BarColumn,
@@ -16,14 +22,19 @@ from rich.progress import (
 from send2trash import send2trash
 
 from nano_encoder.console import console
-from nano_encoder.logger import logger
+from nano_encoder.logger import FFMPEG_LOG_FILE, logger
 from nano_encoder.utils import (
-    VIDEO_FILE_EXTENSIONS,
+    DEFAULT_SCAN_WORKERS,
+    VideoScan,
+    add_optimized_tag,
+    executable_path,
     get_video_codec,
     get_video_duration,
-    has_optimized_version,
     humanize_duration,
     humanize_file_size,
+    probe_videos,
+    remove_optimized_tag,
+    scan_video_files,
     shorten_path,
 )
 
@@ -32,6 +43,7 @@ from .base_command import BaseCommand
 # Constants for better maintainability
 MICROSECONDS_PER_SECOND = 1_000_000
 DEFAULT_CRF = 28
+DEFAULT_JOBS = 1
 DEFAULT_PRESET: Literal[
     "ultrafast",
     "superfast",
@@ -43,7 +55,6 @@ DEFAULT_PRESET: Literal[
     "slower",
     "veryslow",
 ] = "medium"
-EXCLUDED_FILENAME_PARTS = ["optimized", "optimizing"]
 HEVC_CODEC_IDENTIFIERS = ["hevc", "h265", "h.265"]
 
 
@@ -61,6 +72,9 @@ class OptimizeArgs:
         force_encode: Re-encode videos even if already in h.265 format
         halt_on_increase: Stop optimization if file size increases
         replace_after: Replace original file with optimized version (delete original and remove '.optimized' tag)
+        scan_workers: Number of directories to scan concurrently when looking for videos
+        jobs: Number of videos to encode at the same time
+        threads_per_job: Number of threads each encode may use, None to split the CPU cores between jobs
 
     """
 
@@ -82,6 +96,9 @@ class OptimizeArgs:
     force_encode: bool = False
     halt_on_increase: bool = False
     replace_after: bool = False
+    scan_workers: int = DEFAULT_SCAN_WORKERS
+    jobs: int = DEFAULT_JOBS
+    threads_per_job: int | None = None
 
 
 def handle_optimize_command(args: argparse.Namespace) -> None:
@@ -106,6 +123,9 @@ def handle_optimize_command(args: argparse.Namespace) -> None:
         force_encode=args.force_encode,
         halt_on_increase=args.halt_on_increase,
         replace_after=args.replace_after,
+        scan_workers=args.scan_workers,
+        jobs=args.jobs,
+        threads_per_job=args.threads_per_job,
     )
 
     try:
@@ -157,14 +177,30 @@ class OptimizeDirectory(BaseCommand):
         self.halt_on_increase = args.halt_on_increase
         self.replace_after = args.replace_after
 
-        # Processing state tracking
+        # Scanning and scheduling parameters
+        self.scan_workers = args.scan_workers
+        self.jobs = args.jobs
+
+        # Concurrent encodes share the cores, rather than each x265 sizing its thread pool for the whole machine
+        self.threads_per_job = args.threads_per_job
+        if self.threads_per_job is None and self.jobs > 1:
+            self.threads_per_job = max(1, (os.cpu_count() or 1) // self.jobs)
+
+        # Processing state tracking, guarded by a lock as concurrent jobs report back
         self.total_disk_space_change = 0
         self.processing_duration = 0.0
-        self.completed_duration_of_previous_videos: float = 0.0
+        self._state_lock = threading.Lock()
 
-        # File management
+        # File management, scanned once so optimized siblings and file sizes come from memory
         self.skipped_hevc: list[str] = []
+        self.video_scan = self._scan()
         self.video_files: list[Path] = self._find_video_files()
+        self.video_durations: dict[Path, float] = {}
+
+        # Opened once for the whole batch and shared by every encode, see _process_videos_with_progress().
+        # Encodes append their ffmpeg errors under the lock, so concurrent jobs don't interleave in the log
+        self.ffmpeg_log: BinaryIO | None = None
+        self.ffmpeg_log_lock = threading.Lock()
 
     def execute(self) -> None:
         """Process all video files in the directory with progress tracking."""
@@ -175,6 +211,7 @@ class OptimizeDirectory(BaseCommand):
         start_time = time.perf_counter()
         console.print()
 
+        self.video_durations = self._probe_video_durations()
         self._process_videos_with_progress()
         self.processing_duration = time.perf_counter() - start_time
         self._log_completion_summary()
@@ -189,19 +226,42 @@ class OptimizeDirectory(BaseCommand):
             return False
         return True
 
+    def _probe_video_durations(self) -> dict[Path, float]:
+        """
+        Look up the duration of every video to optimize, running several ffprobes at once.
+
+        Durations are needed up front for the overall progress total, and again as each video is encoded,
+        so every video is probed once per run.
+
+        Returns:
+            dict[Path, float]: Duration in seconds of each video to optimize
+
+        """
+        return probe_videos(get_video_duration, self.video_files)
+
+    def video_duration(self, video: Path) -> float:
+        """Return a video's duration in seconds, probed up front when possible."""
+        if video in self.video_durations:
+            return self.video_durations[video]
+        return get_video_duration(video)
+
     def _process_videos_with_progress(self) -> None:
         """Process all videos with progress bar tracking."""
-        with self.ProgressBar as progress:
-            total_duration = sum(get_video_duration(video) for video in self.video_files)
+        with self.ProgressBar as progress, FFMPEG_LOG_FILE.open("ab") as ffmpeg_log:
+            self.ffmpeg_log = ffmpeg_log
+            total_duration = sum(self.video_durations.values())
             overall_progress_id = progress.add_task(
                 f"Optimizing '{shorten_path(self.directory, 3)}'",
                 total=total_duration,
             )
 
             try:
-                for video in self.video_files:
-                    if not self._process_single_video(video, progress, overall_progress_id):
-                        break  # Halt on increase if configured
+                if self.jobs > 1:
+                    self._process_videos_concurrently(progress, overall_progress_id)
+                else:
+                    for video in self.video_files:
+                        if not self._process_single_video(video, progress, overall_progress_id):
+                            break  # Halt on increase if configured
 
                 progress.update(overall_progress_id, description=f"[green]{self.directory.name}")
 
@@ -212,6 +272,34 @@ class OptimizeDirectory(BaseCommand):
                 logger.warning(f"Batch optimization interrupted for directory: '{self.directory}'")
                 raise
 
+            finally:
+                self.ffmpeg_log = None  # Closed with the batch
+
+    def _process_videos_concurrently(self, progress: Progress, overall_progress_id: TaskID) -> None:
+        """
+        Encode up to `jobs` videos at once, each in its own ffmpeg process.
+
+        Pending videos are cancelled when a job asks to halt or the user interrupts; encodes already
+        running are left to finish (or fail and clean up, after an interrupt reaches ffmpeg).
+
+        Args:
+            progress: Progress bar instance for tracking
+            overall_progress_id: ID of the overall progress task
+
+        """
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            futures = [
+                executor.submit(self._process_single_video, video, progress, overall_progress_id)
+                for video in self.video_files
+            ]
+            try:
+                for future in as_completed(futures):
+                    if not future.result():
+                        break  # Halt on increase if configured
+            finally:
+                for future in futures:
+                    future.cancel()
+
     def _process_single_video(
         self,
         video: Path,
@@ -230,28 +318,25 @@ class OptimizeDirectory(BaseCommand):
             bool: True to continue processing, False to halt
 
         """
-        task_id = progress.add_task(f"[yellow]{video.name}", total=get_video_duration(video))
+        task_id = progress.add_task(f"[yellow]{video.name}", total=self.video_duration(video))
+        optimizer: VideoOptimizer | None = None
 
         try:
-            optimizer = VideoOptimizer(
-                video,
-                self,
-                overall_progress_id,
-                self.completed_duration_of_previous_videos,
-            )
+            optimizer = VideoOptimizer(video, self, overall_progress_id, self.video_scan.stat(video))
             optimizer.task_id = task_id
             optimizer.optimize()
 
             if self._should_halt_on_size_increase(optimizer, video):
                 return False
 
-            # Post-optimization actions
-            if self.replace_after:
-                self._delete_original_file(video)
-                # Automatically untag when replacing original to replace it cleanly
-                self._untag_optimized_file(optimizer.output_file)
+            with self._state_lock:
+                # Post-optimization actions
+                if self.replace_after:
+                    self._delete_original_file(video)
+                    # Automatically untag when replacing original to replace it cleanly
+                    self._untag_optimized_file(optimizer.output_file)
 
-            self.total_disk_space_change += optimizer.disk_space_change
+                self.total_disk_space_change += optimizer.disk_space_change
 
         except KeyboardInterrupt:
             # Handle interruption at video level - cleanup and re-raise
@@ -263,10 +348,11 @@ class OptimizeDirectory(BaseCommand):
             logger.error(f"Failed to process '{video}': {e}")
             progress.update(task_id, description=f"[red]Failed: {video.name}")
 
-        # Update progress tracking
-        video_duration = get_video_duration(video)
+        # Update progress tracking, crediting the overall task with whatever ffmpeg didn't report
+        video_duration = self.video_duration(video)
+        reported_duration = optimizer.reported_duration if optimizer else 0.0
         progress.update(task_id, completed=video_duration, description=f"[green]{video.name}")
-        self.completed_duration_of_previous_videos += video_duration
+        progress.update(overall_progress_id, advance=video_duration - reported_duration)
 
         return True
 
@@ -288,29 +374,25 @@ class OptimizeDirectory(BaseCommand):
             f"Total disk space: {humanize_file_size(abs(self.total_disk_space_change))} {space_change_desc}.",
         )
 
-    def _video_already_optimized(self, file_path: Path) -> bool:
+    def _video_already_optimized(self, file_path: Path, scan: VideoScan) -> bool:
         """Check if the file already has an optimized version."""
-        if has_optimized_version(file_path):
+        if scan.optimized_version(file_path):
             logger.info(f"'{file_path.name}' has optimized version. Skipping.")
             return True
         return False
 
-    def _is_hevc_video(self, video: Path) -> bool:
+    def _is_hevc_video(self, video: Path, video_codec: str) -> bool:
         """
         Check if video is already encoded with HEVC/h.265.
 
         Args:
             video: Path to the video file to check
+            video_codec: Codec name of the video's first video stream, from ffprobe
 
         Returns:
             bool: True if the video is already HEVC encoded
 
         """
-        # If --force is used, treat all videos as non-HEVC to ensure they are processed
-        if self.force_encode:
-            return False
-
-        video_codec = get_video_codec(video)
         is_hevc = any(codec in video_codec.lower() for codec in HEVC_CODEC_IDENTIFIERS)
 
         if is_hevc:
@@ -319,45 +401,80 @@ class OptimizeDirectory(BaseCommand):
 
         return is_hevc
 
-    def _should_exclude_video(self, video: Path) -> bool:
+    def _drop_hevc_videos(self, videos: list[Path]) -> list[Path]:
         """
-        Determine if a video should be excluded from processing.
+        Remove videos already encoded with HEVC/h.265, probing several codecs at once.
 
         Args:
-            video: Path to the video file to check
+            videos: Video files to check
 
         Returns:
-            bool: True if the video should be excluded
+            list[Path]: Videos that still need encoding
 
         """
-        # Check for excluded filename parts
-        if any(exclude in video.name for exclude in EXCLUDED_FILENAME_PARTS):
-            return True
+        # If --force is used, treat all videos as non-HEVC to ensure they are processed
+        if self.force_encode:
+            return videos
 
-        # Check if already optimized
-        if self._video_already_optimized(video):
-            return True
+        video_codecs = probe_videos(get_video_codec, videos)
+        return [video for video, video_codec in video_codecs.items() if not self._is_hevc_video(video, video_codec)]
 
-        # Check if already HEVC encoded (unless forced)
-        return self._is_hevc_video(video)
+    def _drop_hardlinked_duplicates(self, videos: list[Path], scan: VideoScan) -> list[Path]:
+        """
+        Keep one name per file when videos are hardlinked, so the same file isn't encoded twice.
+
+        Args:
+            videos: Video files to check
+            scan: Directory scan used to reuse each video's stat result
+
+        Returns:
+            list[Path]: Videos with hardlinked duplicates removed
 
-    def _find_video_files(self) -> list[Path]:
         """
-        Scan the directory for video files that need optimization.
+        seen_files: dict[tuple[int, int], Path] = {}
+        unique_videos = []
+        for video in sorted(videos):
+            video_stat = scan.stat(video)
+            # Directory listings on Windows leave the inode and link count at zero, only a full stat fills them in
+            if not video_stat.st_ino:
+                with contextlib.suppress(OSError):
+                    video_stat = video.stat()
+            # Only files with several links can be duplicates
+            if video_stat.st_nlink > 1 and video_stat.st_ino:
+                file_id = (video_stat.st_dev, video_stat.st_ino)
+                if file_id in seen_files:
+                    logger.info(f"'{video.name}' is a hardlink of '{seen_files[file_id].name}'. Skipping.")
+                    continue
+                seen_files[file_id] = video
+            unique_videos.append(video)
+        return unique_videos
+
+    def _scan(self) -> VideoScan:
+        """
+        Walk the directory once, collecting every video file by optimization tag.
 
         Returns:
-            list[Path]: Sorted list of video files ready for processing
+            VideoScan: All video files found in the directory
 
         """
         console.print("Scanning directory for video files..", end="")
+        return scan_video_files(self.directory, self.scan_workers)
+
+    def _find_video_files(self) -> list[Path]:
+        """
+        Select the scanned video files that need optimization.
 
-        # Collect all video files by extension
-        video_files: list[Path] = []
-        for ext in VIDEO_FILE_EXTENSIONS:
-            video_files.extend(self.directory.rglob(f"*.{ext}"))
+        Returns:
+            list[Path]: Sorted list of video files ready for processing
 
-        # Filter out videos that should be excluded
-        video_files = [video for video in video_files if not self._should_exclude_video(video)]
+        """
+        # The scan already set tagged files aside. Filter out originals with an optimized version, hardlinked
+        # duplicates, then those already HEVC encoded (unless forced)
+        video_files = [
+            video for video in self.video_scan.originals if not self._video_already_optimized(video, self.video_scan)
+        ]
+        video_files = self._drop_hardlinked_duplicates(video_files, self.video_scan)
+        video_files = self._drop_hevc_videos(video_files)
 
         self._display_scan_results(video_files)
         return sorted(video_files)
@@ -375,19 +492,19 @@ class OptimizeDirectory(BaseCommand):
 
     def _all_done_message(self) -> None:
         """Display completion message with statistics."""
-        console.print()
-        console.print(f"[green]All done[/] optimizing [b]{self.directory.name}[/]!")
-        console.print(f"Total duration: [yellow]{humanize_duration(self.processing_duration)}")
-        console.print(
-            f"Total disk space: [yellow]{humanize_file_size(abs(self.total_disk_space_change))}",
-            end="",
-        )
-        console.print(f" {'[green]saved[/]' if self.total_disk_space_change > 0 else '[red]increased[/]'}")
-        console.print()
+        space_change_desc = "[green]saved[/]" if self.total_disk_space_change > 0 else "[red]increased[/]"
+        summary_lines = [
+            "",
+            f"[green]All done[/] optimizing [b]{self.directory.name}[/]!",
+            f"Total duration: [yellow]{humanize_duration(self.processing_duration)}[/]",
+            f"Total disk space: [yellow]{humanize_file_size(abs(self.total_disk_space_change))}[/] {space_change_desc}",
+            "",
+        ]
+        console.print("\n".join(summary_lines))
 
     def _average_video_length(self) -> float:
         """Calculate average video duration in the directory."""
-        total_video_length = sum(get_video_duration(video) for video in self.video_files)
+        total_video_length = sum(self.video_duration(video) for video in self.video_files)
         return round(total_video_length / len(self.video_files))
 
     @staticmethod
@@ -424,9 +541,7 @@ class OptimizeDirectory(BaseCommand):
         """
         try:
             # Generate untagged filename
-            untagged_name = optimized_file.with_name(
-                optimized_file.name.replace(".optimized", ""),
-            )
+            untagged_name = optimized_file.with_name(remove_optimized_tag(optimized_file.name))
 
             # Check if untagged file already exists
             if untagged_name.exists():
@@ -462,7 +577,7 @@ class VideoOptimizer:
         video_file: Path,
         optimize_dir: "OptimizeDirectory",
         overall_progress_id: TaskID,
-        completed_duration_of_previous_videos: float,
+        original_stat: os.stat_result | None = None,
     ) -> None:
         """
         Initialize video optimizer for a single file.
@@ -471,12 +586,13 @@ class VideoOptimizer:
             video_file: Path to the input video file
             optimize_dir: Parent optimization directory instance
             overall_progress_id: Progress task ID for overall operation
-            completed_duration_of_previous_videos: Duration of previously processed videos
+            original_stat: Stat result of the input file if already known (e.g. from the directory scan)
 
         """
         # Input/output file management
         self.input_file = video_file
         self.output_file = self._create_optimizing_output_path()
+        self.final_output_file = self.input_file.with_name(add_optimized_tag(self.input_file.name))
         self._cleanup_existing_optimizing_file()
 
         # Encoding configuration from parent
@@ -484,9 +600,12 @@ class VideoOptimizer:
         self.downscale = optimize_dir.downscale
         self.preset = optimize_dir.preset
         self.tune = optimize_dir.tune
+        self.threads = optimize_dir.threads_per_job
+        self.ffmpeg_log = optimize_dir.ffmpeg_log
+        self.ffmpeg_log_lock = optimize_dir.ffmpeg_log_lock
 
         # Size and performance tracking
-        self.original_size = self.input_file.stat().st_size
+        self.original_size = (original_stat or self.input_file.stat()).st_size
         self.post_optimization_size: int = 0
         self.disk_space_change = 0
         self.encoding_duration = 0.0
@@ -496,8 +615,8 @@ class VideoOptimizer:
         self.progress = optimize_dir.ProgressBar
         self.task_id: TaskID = TaskID(0)
         self.overall_progress_id = overall_progress_id
-        self.video_duration = get_video_duration(self.input_file)
-        self.completed_duration_of_previous_videos = completed_duration_of_previous_videos
+        self.video_duration = optimize_dir.video_duration(self.input_file)
+        self.reported_duration = 0.0  # Seconds of this video already credited to the overall task
 
     def _cleanup_existing_optimizing_file(self) -> None:
         """Delete existing .optimizing file if present."""
@@ -548,7 +667,7 @@ class VideoOptimizer:
             video_filters.append(f"scale=-2:{self.downscale}")
 
         # Base command structure
-        command = ["ffmpeg"]
+        command = [executable_path("ffmpeg")]
 
         # Input file
         command.extend(["-i", str(self.input_file)])
@@ -563,7 +682,11 @@ class VideoOptimizer:
             command.extend(["-tune", self.tune])
 
         # Performance and compatibility settings
-        command.extend(["-threads", "0"])  # Use all available threads
+        if self.threads:
+            command.extend(["-threads", str(self.threads)])  # Limit decoding and filtering threads
+            command.extend(["-x265-params", f"pools={self.threads}"])  # Limit x265's own thread pool
+        else:
+            command.extend(["-threads", "0"])  # Use all available threads
         command.extend(["-c:a", "copy"])  # Copy audio stream as-is
         command.extend(["-c:s", "copy"])  # Copy subtitle streams as-is
         command.extend(["-tag:v", "hvc1"])  # Apple compatibility tag
@@ -593,9 +716,15 @@ class VideoOptimizer:
         """
         process = None
         try:
-            process = self._start_ffmpeg_process(command)
-            self._process_ffmpeg_output(process)
-            self._validate_ffmpeg_completion(process, command)
+            # ffmpeg writes its errors to a file of its own, Python only reads the progress stream.
+            # Concurrent encodes would interleave in a shared log, so the errors are appended once ffmpeg is done
+            with tempfile.TemporaryFile() as ffmpeg_errors:
+                try:
+                    process = self._start_ffmpeg_process(command, ffmpeg_errors)
+                    self._process_ffmpeg_output(process)
+                    self._validate_ffmpeg_completion(process, command)
+                finally:
+                    self._append_to_ffmpeg_log(ffmpeg_errors)
 
         except KeyboardInterrupt:
             self._handle_keyboard_interrupt(process)
@@ -605,12 +734,33 @@ class VideoOptimizer:
             self._handle_ffmpeg_error(process, e)
             raise
 
-    def _start_ffmpeg_process(self, command: list[str]) -> subprocess.Popen:
-        """Start the FFmpeg subprocess."""
+    def _append_to_ffmpeg_log(self, ffmpeg_errors: BinaryIO) -> None:
+        """
+        Append an encode's spooled ffmpeg errors to the ffmpeg log, under its header.
+
+        Encodes that report no errors leave the log untouched, rather than adding an empty section.
+
+        Args:
+            ffmpeg_errors: Temporary file ffmpeg wrote its errors to
+
+        """
+        # ffmpeg writes through the shared descriptor, so the offset is the number of bytes it wrote
+        if ffmpeg_errors.tell() == 0:
+            return
+        ffmpeg_errors.seek(0)
+        with self.ffmpeg_log_lock, contextlib.ExitStack() as stack:
+            # Share the batch's open log, only opening one for an encode started on its own
+            ffmpeg_log = self.ffmpeg_log or stack.enter_context(FFMPEG_LOG_FILE.open("ab"))
+            ffmpeg_log.write(f"\n=== Encoding: {self.input_file.name} ===\n".encode())
+            shutil.copyfileobj(ffmpeg_errors, ffmpeg_log)
+            ffmpeg_log.flush()
+
+    def _start_ffmpeg_process(self, command: list[str], ffmpeg_errors: BinaryIO) -> subprocess.Popen:
+        """Start the FFmpeg subprocess, with its progress piped back and its errors spooled to a file."""
         return subprocess.Popen(
             command,
             stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
+            stderr=ffmpeg_errors,
             universal_newlines=True,
             encoding="utf-8",
         )
@@ -686,12 +836,15 @@ class VideoOptimizer:
             # Update individual video progress
             self.progress.update(self.task_id, completed=current_video_completed_seconds)
 
-            # Update overall batch progress
-            total_completed = self.completed_duration_of_previous_videos + current_video_completed_seconds
-            self.progress.update(self.overall_progress_id, completed=total_completed)
+            # Advance overall batch progress by this video's share, so concurrent jobs add up
+            self.progress.update(
+                self.overall_progress_id,
+                advance=current_video_completed_seconds - self.reported_duration,
+            )
+            self.reported_duration = current_video_completed_seconds
 
         except (ValueError, KeyError) as e:
-            logger.debug(f"Failed to parse progress data: {e}")
+            logger.debug("Failed to parse progress data: %s", e)
 
     def _validate_output(self) -> None:
         """
@@ -701,12 +854,14 @@ class VideoOptimizer:
             FileNotFoundError: If the optimized file was not created
 
         """
-        if not self.output_file.exists():
+        # A single stat both confirms the output exists and sizes it
+        try:
+            self.post_optimization_size = self.output_file.stat().st_size
+        except FileNotFoundError as e:
             error_msg = f"Optimized file not created for '{self.input_file.name}'"
             logger.error(error_msg)
-            raise FileNotFoundError(error_msg)
+            raise FileNotFoundError(error_msg) from e
 
-        self.post_optimization_size = int(self.output_file.stat().st_size)
         self.disk_space_change = self.original_size - self.post_optimization_size
 
     def _rename_final_output(self) -> None:
@@ -716,11 +871,8 @@ class VideoOptimizer:
         This marks the completion of the encoding process and makes the file
         available for use while preventing conflicts with future operations.
         """
-        final_name = self.output_file.with_name(
-            self.output_file.name.replace("optimizing", "optimized"),
-        )
-        self.output_file.rename(final_name)
-        self.output_file = final_name
+        self.output_file.replace(self.final_output_file)
+        self.output_file = self.final_output_file
 
     def _log_report(self) -> None:
         """Generate and log comprehensive encoding results report."""
@@ -735,5 +887,4 @@ class VideoOptimizer:
             f"Disk space: {humanize_file_size(abs(self.disk_space_change))} {space_change_desc}.",
         ]
 
-        for line in report_lines:
-            logger.info(line)
+        logger.info(" ".join(report_lines))
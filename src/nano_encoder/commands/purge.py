@@ -1,4 +1,8 @@
 import argparse
+import contextlib
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -6,13 +10,18 @@ from send2trash import send2trash
 
 from nano_encoder.console import console
 from nano_encoder.logger import logger
-from nano_encoder.utils import VIDEO_FILE_EXTENSIONS, find_all_video_files, has_optimized_version
+from nano_encoder.utils import (
+    DEFAULT_SCAN_WORKERS,
+    FILE_OPERATION_WORKERS,
+    VideoScan,
+    add_optimized_tag,
+    scan_video_files,
+)
 
 from .base_command import BaseCommand
 
 # Constants for better maintainability
-OPTIMIZED_FILENAME_MARKER = "optimized"
-OPTIMIZING_FILENAME_MARKER = ".optimizing."
+STATUS_LINES_PER_PRINT = 100
 
 
 @dataclass
@@ -24,12 +33,14 @@ class PurgeArgs:
         directory: Directory containing original videos to purge
         permanent: Whether to permanently delete files instead of moving to trash
         skip_confirmation: Whether to skip user confirmation prompt
+        scan_workers: Number of directories to scan concurrently when looking for originals
 
     """
 
     directory: Path
     permanent: bool = False
     skip_confirmation: bool = False
+    scan_workers: int = DEFAULT_SCAN_WORKERS
 
 
 def handle_purge_command(args: argparse.Namespace) -> None:
@@ -49,6 +60,7 @@ def handle_purge_command(args: argparse.Namespace) -> None:
         directory=args.directory,
         permanent=args.permanent,
         skip_confirmation=args.skip_confirmation,
+        scan_workers=args.scan_workers,
     )
 
     try:
@@ -85,8 +97,10 @@ class PurgeDirectory(BaseCommand):
         # Operation configuration
         self.permanent = args.permanent
         self.skip_confirmation = args.skip_confirmation
+        self.scan_workers = args.scan_workers
 
-        # File discovery
+        # File discovery, one walk shared by the unfinished-video check and the purge candidates
+        self.video_scan = self._scan()
         self.original_files = self._find_original_files_to_purge()
 
     def execute(self) -> None:
@@ -170,35 +184,97 @@ class PurgeDirectory(BaseCommand):
         console.print(f"Found {len(self.original_files)} original(s) with optimized versions:")
 
         for original in self.original_files:
-            optimized_name = f"{original.stem}.{OPTIMIZED_FILENAME_MARKER}{original.suffix}"
-            console.print(f" - {original.name} → {optimized_name}")
+            console.print(f" - {original.name} → {add_optimized_tag(original.name)}")
 
         console.print()
         return self._confirm_action(message)
 
     def _execute_purge_operation(self) -> None:
-        """Perform the actual file deletion or trash operation."""
-        deletion_count = 0
-
-        for original_file in self.original_files:
-            try:
-                console.print(f"Removing '{original_file.name}'")
+        """
+        Perform the actual file deletion or trash operation.
 
-                if self.permanent:
-                    original_file.unlink()
+        Permanent deletions are independent blocking syscalls, so they're spread over a bounded
+        thread pool. Trashing stays serial, as send2trash isn't safe to call concurrently.
+        """
+        deletion_count = 0
+        max_workers = FILE_OPERATION_WORKERS if self.permanent else 1
+        status_lines: list[str] = []
+
+        with contextlib.ExitStack() as directories, ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # Only valid until the stack closes them, so the descriptors never outlive this deletion pass
+            directory_fds: dict[Path, int] = {}
+            if self.permanent and os.unlink in os.supports_dir_fd:
+                directory_fds = self._open_parent_directories(directories)
+            for original_file, error in executor.map(
+                functools.partial(self._remove_original_file, directory_fds=directory_fds),
+                self.original_files,
+            ):
+                if error:
+                    error_msg = f"Failed to remove '{original_file.name}': {error}"
+                    logger.error(error_msg)
+                    status_lines.append(f"[red]Error: {error_msg}[/]")
                 else:
-                    send2trash(str(original_file))
+                    logger.info(f"Purged '{original_file.name}'")
+                    status_lines.append(f"Removed '{original_file.name}'")
+                    deletion_count += 1
 
-                logger.info(f"Purged '{original_file.name}'")
-                deletion_count += 1
+                # Print status in batches rather than rendering every line on its own
+                if len(status_lines) >= STATUS_LINES_PER_PRINT:
+                    console.print("\n".join(status_lines))
+                    status_lines.clear()
 
-            except (OSError, PermissionError) as e:
-                error_msg = f"Failed to remove '{original_file.name}': {e}"
-                logger.error(error_msg)
-                console.print(f"[red]Error: {error_msg}[/]")
+        if status_lines:
+            console.print("\n".join(status_lines))
 
         self._log_completion_summary(deletion_count)
 
+    def _open_parent_directories(self, stack: contextlib.ExitStack) -> dict[Path, int]:
+        """
+        Open the directory of each original once, so deletions don't resolve the full path for every file.
+
+        Args:
+            stack: Exit stack the directory descriptors are closed by
+
+        Returns:
+            dict[Path, int]: Open file descriptor of each directory, directories that couldn't be opened are left out
+
+        """
+        directory_fds: dict[Path, int] = {}
+        for directory in {original.parent for original in self.original_files}:
+            with contextlib.suppress(OSError):
+                directory_fds[directory] = os.open(directory, os.O_RDONLY | getattr(os, "O_DIRECTORY", 0))
+                stack.callback(os.close, directory_fds[directory])
+        return directory_fds
+
+    def _remove_original_file(
+        self,
+        original_file: Path,
+        directory_fds: dict[Path, int],
+    ) -> tuple[Path, OSError | None]:
+        """
+        Delete or trash a single original file.
+
+        Args:
+            original_file: Path to the original video file to remove
+            directory_fds: Open descriptors of the originals' directories, to delete relative to
+
+        Returns:
+            tuple[Path, OSError | None]: The file, and the error raised while removing it (if any)
+
+        """
+        try:
+            if self.permanent:
+                dir_fd = directory_fds.get(original_file.parent)
+                if dir_fd is None:
+                    os.unlink(original_file)  # noqa: PTH108
+                else:
+                    os.unlink(original_file.name, dir_fd=dir_fd)
+            else:
+                send2trash(str(original_file))
+        except OSError as e:
+            return original_file, e
+        return original_file, None
+
     def _log_completion_summary(self, deletion_count: int) -> None:
         """Log and display the purge operation summary."""
         operation_type = "Permanently deleted" if self.permanent else "Moved to trash"
@@ -210,27 +286,27 @@ class PurgeDirectory(BaseCommand):
         else:
             console.print("[yellow]No files were successfully removed[/]")
 
-    def _find_original_files_to_purge(self) -> list[Path]:
+    def _scan(self) -> VideoScan:
         """
-        Scan directory for original video files that have optimized counterparts.
+        Walk the directory once, collecting every video file by optimization tag.
 
         Returns:
-            list[Path]: List of original video files ready for purging
+            VideoScan: All video files found in the directory
 
         """
         console.print("Scanning for original files with optimized versions..", end="")
+        return scan_video_files(self.directory, self.scan_workers)
 
-        # Collect all video files in directory
-        candidate_files: list[Path] = []
-        for ext in VIDEO_FILE_EXTENSIONS:
-            candidate_files.extend(self.directory.rglob(f"*.{ext}"))
+    def _find_original_files_to_purge(self) -> list[Path]:
+        """
+        Select the original video files that have optimized counterparts.
 
-        # Filter to only original files that have optimized versions
-        original_files = [
-            file
-            for file in candidate_files
-            if OPTIMIZED_FILENAME_MARKER not in file.name and has_optimized_version(file)
-        ]
+        Returns:
+            list[Path]: List of original video files ready for purging
+
+        """
+        # Filter to only original files that have optimized versions, resolved from the scan
+        original_files = sorted(file for file in self.video_scan.originals if self.video_scan.optimized_version(file))
 
         console.print(f" found [blue]{len(original_files)}[/] candidate(s)")
         return original_files
@@ -243,10 +319,5 @@ class PurgeDirectory(BaseCommand):
             Path | None: Path to unfinished video file if found, None otherwise
 
         """
-        all_videos = find_all_video_files(self.directory)
-
-        for video in all_videos:
-            if OPTIMIZING_FILENAME_MARKER in video.name:
-                return video
-
-        return None
+        # The scan already classified names by their optimization tag
+        return next(iter(self.video_scan.optimizing), None)
@@ -1,6 +1,7 @@
 """Untag command functionality for removing optimization markers from filenames."""
 
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -8,7 +9,11 @@ from rich.table import Table
 
 from nano_encoder.console import console
 from nano_encoder.logger import logger
-from nano_encoder.utils import find_all_video_files
+from nano_encoder.utils import (
+    FILE_OPERATION_WORKERS,
+    find_all_video_files,
+    remove_optimized_tag,
+)
 
 from .base_command import BaseCommand
 
@@ -82,16 +87,26 @@ class UntagDirectory(BaseCommand):
 
         Raises:
             ValueError: If no optimized videos are found in the directory
+            UntaggedVideoOverwriteError: If untagging a video would overwrite an existing file
 
         """
         super().__init__(args.directory)
         self.args = args
-        self.videos = find_all_video_files(self.directory, optimized_only=True)
+        self.videos = [
+            video
+            for video in find_all_video_files(self.directory, optimized_only=True, sort=True)
+            if video.stem.endswith(OPTIMIZED_FILENAME_MARKER)
+        ]
 
         if not self.videos:
             msg = f"There are no videos to untag in '{self.directory.name}'."
             raise ValueError(msg)
 
+        # Compute (and validate) every new name once, shared by the preview and the renaming
+        self._rename_plan: list[tuple[Path, str]] = [
+            (video, self._generate_untagged_name(video)) for video in self.videos
+        ]
+
     def execute(self) -> None:
         """
         Execute the untag operation.
@@ -106,17 +121,21 @@ class UntagDirectory(BaseCommand):
         """Perform the actual file renaming operations."""
         renamed_count = 0
 
-        for video in self.videos:
-            try:
-                new_name = self._generate_untagged_name(video)
-                video.rename(new_name)
+        with ThreadPoolExecutor(max_workers=FILE_OPERATION_WORKERS) as executor:
+            for (video, new_name), error in zip(
+                self._rename_plan,
+                executor.map(self._rename_video, self._rename_plan),
+                strict=True,
+            ):
+                if error:
+                    error_msg = f"Failed to rename '{video.name}': {error}"
+                    console.print(f"[red]Error: {error_msg}[/]")
+                    logger.error(error_msg)
+                    continue
+
                 renamed_count += 1
-                console.print(f"Renamed: {video.name} → {new_name.name}")
+                console.print(f"Renamed: {video.name} → {new_name}")
                 logger.info(f"Successfully untagged: {video} → {new_name}")
-            except (OSError, UntaggedVideoOverwriteError) as e:
-                error_msg = f"Failed to rename '{video.name}': {e}"
-                console.print(f"[red]Error: {error_msg}[/]")
-                logger.error(error_msg)
 
         # Log completion summary
         if renamed_count > 0:
@@ -126,6 +145,26 @@ class UntagDirectory(BaseCommand):
         else:
             console.print("[yellow]No files were successfully renamed[/]")
 
+    @staticmethod
+    def _rename_video(rename: tuple[Path, str]) -> OSError | UntaggedVideoOverwriteError | None:
+        """
+        Rename a single video, returning the error raised (if any) rather than raising it.
+
+        Args:
+            rename: Pair of the current path and the untagged file name
+
+        """
+        video, new_name = rename
+        untagged_video = video.with_name(new_name)
+        # Checked again right before renaming, a file may have appeared while the preview was shown
+        if untagged_video.exists():
+            return UntaggedVideoOverwriteError(new_name)
+        try:
+            video.rename(untagged_video)
+        except OSError as e:
+            return e
+        return None
+
     def _confirm_untag(self) -> bool:
         """
         Display comparison table and confirm the untag operation.
@@ -136,14 +175,13 @@ class UntagDirectory(BaseCommand):
         """
         comparison_table = Table(TABLE_COLUMN_CURRENT, TABLE_COLUMN_UNTAGGED)
 
-        for video in self.videos:
-            untagged_name = self._generate_untagged_name(video)
-            comparison_table.add_row(video.name, untagged_name.name)
+        for video, untagged_name in self._rename_plan:
+            comparison_table.add_row(video.name, untagged_name)
 
         console.print(comparison_table)
         return self._confirm_action(UNTAG_CONFIRMATION_MESSAGE, warning=UNTAG_WARNING_MESSAGE)
 
-    def _generate_untagged_name(self, video: Path) -> Path:
+    def _generate_untagged_name(self, video: Path) -> str:
         """
         Generate the untagged version of the filename.
 
@@ -151,15 +189,15 @@ class UntagDirectory(BaseCommand):
             video: Path to the video file to untag
 
         Returns:
-            Path: New path with optimization marker removed
+            str: New file name with optimization marker removed
 
         Raises:
             UntaggedVideoOverwriteError: If the untagged name would overwrite an existing file
 
         """
-        untagged_video = video.with_name(video.name.replace(OPTIMIZED_FILENAME_MARKER, ""))
+        untagged_name = remove_optimized_tag(video.name)
 
-        if untagged_video.exists():
-            raise UntaggedVideoOverwriteError(untagged_video.name)
+        if video.with_name(untagged_name).exists():
+            raise UntaggedVideoOverwriteError(untagged_name)
 
-        return untagged_video
+        return untagged_name
@@ -13,9 +13,13 @@ Log files:
 - NanoEncoder_ffmpeg.log: FFmpeg command output and debugging
 """
 
+import atexit
 import logging
+import logging.handlers
 import os
 import platform
+import queue
+from functools import partialmethod
 from pathlib import Path
 
 
@@ -49,17 +53,18 @@ def get_log_directory() -> Path:
     return get_default_log_directory()
 
 
-# Ensure log directory exists
+# Define log file paths, the directory is created by configure_logging()
 LOG_DIR = get_log_directory()
-LOG_DIR.mkdir(parents=True, exist_ok=True)
-
-# Define log file paths
 NANO_ENCODER_LOG_FILE: Path = LOG_DIR / "NanoEncoder.log"
 FFMPEG_LOG_FILE: Path = LOG_DIR / "NanoEncoder_ffmpeg.log"
 
 
 class NanoEncoderLogger:
-    """Custom logger wrapper that handles string and list messages."""
+    """
+    Custom logger wrapper that handles string and list messages.
+
+    Messages are only stringified for enabled levels, so disabled calls cost a level check.
+    """
 
     def __init__(self, name: str = "NanoEncoder") -> None:
         self._logger = logging.getLogger(name)
@@ -71,25 +76,16 @@ class NanoEncoderLogger:
             return " ".join(str(m) for m in msg)
         return str(msg)
 
-    def debug(self, msg: str | list[str], *args: object, **kwargs: object) -> None:
-        """Log a debug message."""
-        self._logger.debug(self._stringify(msg), *args, **kwargs)  # type: ignore[arg-type]
-
-    def info(self, msg: str | list[str], *args: object, **kwargs: object) -> None:
-        """Log an info message."""
-        self._logger.info(self._stringify(msg), *args, **kwargs)  # type: ignore[arg-type]
+    def _log(self, level: int, msg: str | list[str], *args: object, **kwargs: object) -> None:
+        """Log a message at the given level."""
+        if self._logger.isEnabledFor(level):
+            self._logger.log(level, self._stringify(msg), *args, **kwargs)  # type: ignore[arg-type]
 
-    def warning(self, msg: str | list[str], *args: object, **kwargs: object) -> None:
-        """Log a warning message."""
-        self._logger.warning(self._stringify(msg), *args, **kwargs)  # type: ignore[arg-type]
-
-    def error(self, msg: str | list[str], *args: object, **kwargs: object) -> None:
-        """Log an error message."""
-        self._logger.error(self._stringify(msg), *args, **kwargs)  # type: ignore[arg-type]
-
-    def critical(self, msg: str | list[str], *args: object, **kwargs: object) -> None:
-        """Log a critical message."""
-        self._logger.critical(self._stringify(msg), *args, **kwargs)  # type: ignore[arg-type]
+    debug = partialmethod(_log, logging.DEBUG)
+    info = partialmethod(_log, logging.INFO)
+    warning = partialmethod(_log, logging.WARNING)
+    error = partialmethod(_log, logging.ERROR)
+    critical = partialmethod(_log, logging.CRITICAL)
 
     def set_level(self, level: int) -> None:
         """Set the logging level."""
@@ -100,11 +96,33 @@ class NanoEncoderLogger:
         self._logger.addHandler(handler)
 
 
-# Configure logging
 logger = NanoEncoderLogger("NanoEncoder")
+_logging_configured = False
+
+
+def configure_logging() -> None:
+    """
+    Create the log directory and attach the log file handler.
+
+    Records are handed to a queue and written to the file by a single listener thread, so encoding and
+    health check workers never block on file writes. The listener is flushed and stopped at exit.
+
+    Called once a command is about to run, so importing the package (e.g. for --help) doesn't touch the disk.
+    Calling it again does nothing.
+    """
+    global _logging_configured  # noqa: PLW0603
+    if _logging_configured:
+        return
+
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+
+    file_handler = logging.FileHandler(NANO_ENCODER_LOG_FILE, encoding="utf-8")
+    formatter = logging.Formatter("%(asctime)s - %(levelname)-8s - %(message)s")
+    file_handler.setFormatter(formatter)
 
-# File handler
-file_handler = logging.FileHandler(NANO_ENCODER_LOG_FILE, encoding="utf-8")
-formatter = logging.Formatter("%(asctime)s - %(levelname)-8s - %(message)s")
-file_handler.setFormatter(formatter)
-logger.add_handler(file_handler)
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, file_handler)
+    listener.start()
+    atexit.register(listener.stop)
+    logger.add_handler(logging.handlers.QueueHandler(log_queue))
+    _logging_configured = True
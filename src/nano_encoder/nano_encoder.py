@@ -1,4 +1,3 @@
-import shutil
 import sys
 import traceback
 
@@ -8,7 +7,8 @@ from .commands.optimize import handle_optimize_command
 from .commands.purge import handle_purge_command
 from .commands.untag import handle_untag_command
 from .console import console
-from .logger import logger
+from .logger import configure_logging, logger
+from .utils import find_executable
 
 
 def welcome_message() -> None:
@@ -22,7 +22,7 @@ def ffmpeg_check() -> None:
     """Check if FFmpeg is installed."""
     required_apps = ["ffmpeg", "ffprobe"]
     for app in required_apps:
-        if not shutil.which(app):
+        if not find_executable(app):
             print(f"NanoEncoder depends on {app}, which is not installed on this system.")
             print("Install from here: https://www.ffmpeg.org/download.html")
             if app == "ffprobe":
@@ -35,6 +35,7 @@ def main() -> None:
     """Entrypoint to app."""
     parser = create_parser()
     args = parser.parse_args()
+    configure_logging()
 
     welcome_message()
     ffmpeg_check()
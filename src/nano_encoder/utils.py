@@ -1,21 +1,54 @@
-import math
+import contextlib
+import functools
+import json
+import os
+import re
+import shutil
 import subprocess
+from collections.abc import Callable, Collection, Iterator, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
 from pathlib import Path
 
 from .exceptions import EmptyDirectoryError
 
 # --- Constants ---
 VIDEO_FILE_EXTENSIONS: list[str] = ["mov", "mkv", "mp4"]
+# Extensions match case-sensitively except on Windows, the same as pathlib's globbing
+VIDEO_FILE_PATTERN: re.Pattern[str] = re.compile(
+    rf"\.(?:{'|'.join(map(re.escape, VIDEO_FILE_EXTENSIONS))})\Z",
+    re.IGNORECASE if os.name == "nt" else re.NOFLAG,
+)
+OPTIMIZATION_TAG_PATTERN: re.Pattern[str] = re.compile(r"\.(optimized|optimizing)\.")  # Tags sit before the extension
+FILE_SIZE_UNITS: tuple[str, ...] = ("bytes", "KB", "MB", "GB", "TB")
+FRAME_HASH_WIDTH: int = 9  # One more column than bits per row, each bit compares neighbouring pixels
+FRAME_HASH_HEIGHT: int = 8
+DEFAULT_SCAN_WORKERS: int = min(32, (os.cpu_count() or 1) * 4)
+FILE_OPERATION_WORKERS: int = min(16, (os.cpu_count() or 1) * 2)
 
 
 # --- Utility Functions ---
+@functools.cache
+def find_executable(name: str) -> str | None:
+    """
+    Find an executable on PATH, searching only once per process.
+
+    ffmpeg and ffprobe are run for nearly every video, so the full path is reused instead of walking PATH each time.
+    """
+    return shutil.which(name)
+
+
+def executable_path(name: str) -> str:
+    """Full path to an executable, or its bare name if it couldn't be found on PATH."""
+    return find_executable(name) or name
+
+
 def humanize_duration(seconds: float) -> str:
     """
     Converts seconds to hours, minutes & seconds, pretty much divmod() but for floats
     """
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    seconds = math.floor(seconds % 60)
+    hours, remainder = divmod(int(seconds), 3600)
+    minutes, seconds = divmod(remainder, 60)
 
     if hours:
         return f"{hours}h {minutes}m {seconds}s"
@@ -24,20 +57,16 @@ def humanize_duration(seconds: float) -> str:
 
 def humanize_file_size(size_bytes: int) -> str:
     """
-    Convert bytes to KB, MB, and GB.
+    Convert bytes to KB, MB, GB, and TB.
     """
     if size_bytes < 0:
         msg = "File size cannot be negative"
         raise ValueError(msg)
-    size = float(size_bytes)
-    units = ["bytes", "KB", "MB", "GB"]
-    bytes_in_kib = 1024
-    for unit in units:
-        if size < bytes_in_kib:
-            break
-        if unit != units[-1]:
-            size /= bytes_in_kib
-    return f"{size:.2f} {unit}" if unit != "bytes" else f"{int(size)} {unit}"
+    # Each unit is 1024 (2^10) times the last, so the bit length of the size picks the unit directly
+    unit_index = min(len(FILE_SIZE_UNITS) - 1, max(0, size_bytes.bit_length() - 1) // 10)
+    if unit_index == 0:
+        return f"{size_bytes} {FILE_SIZE_UNITS[0]}"
+    return f"{size_bytes / (1 << (10 * unit_index)):.2f} {FILE_SIZE_UNITS[unit_index]}"
 
 
 def validate_directory(path: Path) -> None:
@@ -55,100 +84,320 @@ def validate_directory(path: Path) -> None:
         raise EmptyDirectoryError(msg)
 
 
-def has_optimized_version(file_path: Path) -> None | Path:
+def remove_optimized_tag(name: str) -> str:
+    """
+    Remove the '.optimized' tag from a file name, e.g. 'show.optimized.mp4' -> 'show.mp4'
+
+    Only a tag directly before the extension is removed, other occurrences in the name are left alone.
+    """
+    stem, dot, ext = name.rpartition(".")
+    if stem.endswith(".optimized"):
+        return stem.removesuffix(".optimized") + dot + ext
+    return name
+
+
+def add_optimized_tag(name: str) -> str:
+    """
+    Add the '.optimized' tag to a file name, e.g. 'show.mp4' -> 'show.optimized.mp4'
+
+    Works on the name string directly, so looking up siblings doesn't build a Path per file.
+    """
+    stem, dot, ext = name.rpartition(".")
+    if not dot:
+        return f"{name}.optimized"
+    return f"{stem}.optimized.{ext}"
+
+
+def has_optimized_version(file_path: Path, siblings: Collection[str] | None = None) -> None | Path:
     """
     Check if original video has accompanying optimized video, and return it if so
+
+    When the names of the files next to it are already known (e.g. from a directory scan), pass them
+    as siblings to check membership instead of stat'ing the optimized path.
     """
-    optimized_path = file_path.with_stem(f"{file_path.stem}.optimized")
+    optimized_name = add_optimized_tag(file_path.name)
+    if siblings is not None:
+        return file_path.with_name(optimized_name) if optimized_name in siblings else None
+    optimized_path = file_path.with_name(optimized_name)
     if optimized_path.exists():
         return optimized_path
     return None
 
 
+@dataclass
+class VideoScan:
+    """
+    Video files of a directory, partitioned by their optimization tag.
+
+    Attributes:
+        originals: Videos without an optimization tag
+        optimized: Videos tagged '.optimized'
+        optimizing: Videos tagged '.optimizing' (unfinished encodes)
+        siblings: Names of all videos found, grouped by their parent directory
+        entries: Directory entries of all videos found, so their stat results can be reused
+
+    """
+
+    originals: list[Path] = field(default_factory=list)
+    optimized: list[Path] = field(default_factory=list)
+    optimizing: list[Path] = field(default_factory=list)
+    siblings: dict[Path, set[str]] = field(default_factory=dict)
+    entries: dict[Path, os.DirEntry[str]] = field(default_factory=dict)
+
+    def optimized_version(self, file_path: Path) -> Path | None:
+        """Return the optimized sibling of an original video if the scan found one, without touching the disk."""
+        return has_optimized_version(file_path, self.siblings.get(file_path.parent, set()))
+
+    def stat(self, file_path: Path) -> os.stat_result:
+        """
+        Stat a video, through its directory entry when the scan found it.
+
+        DirEntry caches its stat result, and on Windows gets it for free from the directory listing.
+        """
+        entry = self.entries.get(file_path)
+        if entry is None:
+            return file_path.stat()
+        return entry.stat()
+
+
+def _list_directory(directory: str) -> tuple[list[os.DirEntry[str]], list[str]]:
+    """
+    List a single directory level, returning the video file entries and subdirectory paths found in it.
+
+    Uses os.scandir so file type checks come from the directory listing itself, without extra
+    stat calls. Hidden directories (trash, thumbnail caches, etc.) aren't descended into, and
+    directories we can't read (no permission, or removed mid-scan) are treated as empty.
+    """
+    videos: list[os.DirEntry[str]] = []
+    subdirectories: list[str] = []
+    with contextlib.suppress(OSError), os.scandir(directory) as entries:
+        for entry in entries:
+            # Like rglob, symlinked directories aren't descended into, but symlinked videos are found
+            if entry.is_dir(follow_symlinks=False):
+                if not entry.name.startswith("."):
+                    subdirectories.append(entry.path)
+            elif VIDEO_FILE_PATTERN.search(entry.name) and entry.is_file():
+                videos.append(entry)
+    return videos, subdirectories
+
+
+def _iter_videos(root: str | Path) -> Iterator[os.DirEntry[str]]:
+    """Recursively yield the entries of all video files under root, one directory listing at a time."""
+    pending = [os.fspath(root)]
+    while pending:
+        videos, subdirectories = _list_directory(pending.pop())
+        yield from videos
+        pending.extend(subdirectories)
+
+
+def parallel_scan(root: Path, max_workers: int = DEFAULT_SCAN_WORKERS) -> list[os.DirEntry[str]]:
+    """
+    Collect the entries of all video files under root, listing directories concurrently.
+
+    Each directory listing is its own task; subdirectories found are submitted back to the pool
+    until no listings are pending. Worth it on network shares, where each listing is a round trip.
+    """
+    videos: list[os.DirEntry[str]] = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending: set[Future[tuple[list[os.DirEntry[str]], list[str]]]] = {
+            executor.submit(_list_directory, os.fspath(root)),
+        }
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                found_videos, subdirectories = future.result()
+                videos.extend(found_videos)
+                pending.update(executor.submit(_list_directory, subdirectory) for subdirectory in subdirectories)
+    return videos
+
+
+def scan_video_files(directory: Path, workers: int = DEFAULT_SCAN_WORKERS) -> VideoScan:
+    """Collect all video files of given directory once, sorting them by optimization tag."""
+    video_entries = parallel_scan(directory, workers) if workers > 1 else _iter_videos(directory)
+    scan = VideoScan()
+    for entry in video_entries:
+        video = Path(entry.path)
+        scan.entries[video] = entry
+        scan.siblings.setdefault(video.parent, set()).add(entry.name)
+        # One search classifies the name, rather than a substring test per tag
+        tag = OPTIMIZATION_TAG_PATTERN.search(entry.name)
+        if tag is None:
+            scan.originals.append(video)
+        elif tag[1] == "optimizing":
+            scan.optimizing.append(video)
+        else:
+            scan.optimized.append(video)
+    return scan
+
+
 def find_all_video_files(
     directory: Path,
     *,
     originals_only: bool = False,
     optimized_only: bool = False,
+    sort: bool = False,
 ) -> list[Path]:
-    """Collect all files of given directory."""
+    """Collect all files of given directory, in walk order unless sort is set."""
     if all([optimized_only, originals_only]):
         # can't be both
         msg = "Cannot specify both 'originals_only' and 'optimized_only'."
         raise ValueError(msg)
 
+    # Filter on the raw path strings, only building Path objects for the files we keep
     video_files: list[Path] = []
-    for ext in VIDEO_FILE_EXTENSIONS:
-        video_files.extend(directory.rglob(f"*.{ext}"))
+    for entry in _iter_videos(directory):
+        tag = OPTIMIZATION_TAG_PATTERN.search(entry.name)
+        if (originals_only and tag is not None) or (optimized_only and (tag is None or tag[1] != "optimized")):
+            continue
+        video_files.append(Path(entry.path))
 
-    video_files = sorted(video_files)
+    return sorted(video_files) if sort else video_files
 
-    if originals_only:
-        video_files = [video for video in video_files if ".optimized" not in video.name]
 
-    if optimized_only:
-        video_files = [video for video in video_files if ".optimized" in video.name]
+def directory_fully_processed(directory: Path) -> bool:
+    """
+    Predicate for if directory is fully processed.
 
-    return video_files
+    Unfinished encodes count as unprocessed. Optimized versions are looked up in the names the scan found
+    in each directory, rather than stat'ing each one.
+    """
+    scan = scan_video_files(directory)
+    return not scan.optimizing and all(scan.optimized_version(video) for video in scan.originals)
 
 
-def directory_fully_processed(directory: Path) -> bool:
-    """Predicate for if directory is fully processed."""
-    video_files = find_all_video_files(directory, originals_only=True)
-    return all(has_optimized_version(video) for video in video_files)
+def memoize_probe[T](probe: Callable[[Path], T]) -> Callable[[Path], T]:
+    """
+    Memoize a probe for the rest of the run, keyed on the video's path, modification time and size.
 
+    A video that changed since it was probed gets a new key and is probed again. Videos that can't be
+    stat'ed skip the cache, so the probe raises its usual error.
+    """
 
-def get_video_duration(video: Path) -> float:
-    """Get video duration (in seconds) using ffprobe."""
+    @functools.lru_cache(maxsize=2048)
+    def cached_probe(video: Path, _mtime_ns: int, _size: int) -> T:
+        return probe(video)
+
+    @functools.wraps(probe)
+    def wrapper(video: Path) -> T:
+        try:
+            video_stat = video.stat()
+        except OSError:
+            return probe(video)
+        return cached_probe(video, video_stat.st_mtime_ns, video_stat.st_size)
+
+    return wrapper
+
+
+@dataclass(frozen=True)
+class VideoInfo:
+    """
+    Metadata of a video, as reported by ffprobe.
+
+    Attributes:
+        duration: Length in seconds, None if the container doesn't report one
+        resolution: Size of the first video stream in '1920x1080' format, empty if there's no video stream
+        codec: Codec name of the first video stream, empty if there's no video stream
+
+    """
+
+    duration: float | None
+    resolution: str
+    codec: str
+
+
+@memoize_probe
+def get_video_info(video: Path) -> VideoInfo:
+    """Get a video's duration, resolution and codec with a single ffprobe run."""
     result = subprocess.run(
         [
-            "ffprobe",
+            executable_path("ffprobe"),
             *["-i", str(video)],
-            *["-show_entries", "format=duration"],
+            *["-select_streams", "v:0"],
+            *["-show_entries", "stream=codec_name,width,height:format=duration"],
             *["-v", "quiet"],
-            *["-of", "csv=p=0"],
+            *["-of", "json"],
         ],
         capture_output=True,
-        text=True,
         check=True,
     )
-    return float(result.stdout.strip())
+    info = json.loads(result.stdout)
+    stream = (info.get("streams") or [{}])[0]
+    duration = info.get("format", {}).get("duration")
+    resolution = f"{stream['width']}x{stream['height']}" if "width" in stream and "height" in stream else ""
+    return VideoInfo(
+        duration=float(duration) if duration is not None else None,
+        resolution=resolution,
+        codec=stream.get("codec_name", ""),
+    )
+
+
+def get_video_duration(video: Path) -> float:
+    """Get video duration (in seconds) using ffprobe."""
+    duration = get_video_info(video).duration
+    if duration is None:
+        msg = f"ffprobe reported no duration for '{video.name}'"
+        raise ValueError(msg)
+    return duration
 
 
 def get_video_resolution(video: Path) -> str:
     """Get video resolution, returned in '1920x1080' format using ffprobe."""
-    result = subprocess.run(
-        [
-            "ffprobe",
-            *["-i", str(video)],
-            *["-select_streams", "v:0"],
-            *["-show_entries", "stream=width,height"],
-            *["-v", "quiet"],
-            *["-of", "csv=s=x:p=0"],
-        ],
-        capture_output=True,
-        text=True,
-        check=True,
-    )
-    return result.stdout.strip()
+    return get_video_info(video).resolution
 
 
 def get_video_codec(video: Path) -> str:
     """Get video codec using ffprobe."""
+    return get_video_info(video).codec
+
+
+def probe_videos[T](probe: Callable[[Path], T], videos: Sequence[Path]) -> dict[Path, T]:
+    """
+    Run a probe (e.g. get_video_duration) over many videos, several ffprobes at once.
+
+    Each probe is mostly spent waiting on its ffprobe process, so threads overlap their startup and I/O.
+    """
+    with ThreadPoolExecutor(max_workers=FILE_OPERATION_WORKERS) as executor:
+        return dict(zip(videos, executor.map(probe, videos), strict=True))
+
+
+def get_frame_hashes(video: Path, timestamps: list[float]) -> list[int]:
+    """
+    Get a 64-bit difference hash (dHash) of the video frame at each timestamp, using ffmpeg.
+
+    Every frame is shrunk to 9x8 grayscale pixels in a single ffmpeg run, and each bit of its hash records
+    whether a pixel is brighter than its right-hand neighbour. Similar looking frames give similar hashes.
+    """
+    inputs = [arg for timestamp in timestamps for arg in ("-ss", f"{timestamp:.3f}", "-i", str(video))]
+    filters = [
+        f"[{i}:v]trim=end_frame=1,scale={FRAME_HASH_WIDTH}:{FRAME_HASH_HEIGHT}:flags=area,format=gray[f{i}]"
+        for i in range(len(timestamps))
+    ]
+    frames = "".join(f"[f{i}]" for i in range(len(timestamps)))
     result = subprocess.run(
         [
-            "ffprobe",
-            *["-i", str(video)],
-            *["-select_streams", "v:0"],
-            *["-show_entries", "stream=codec_name"],
+            executable_path("ffmpeg"),
+            *inputs,
+            *["-filter_complex", ";".join([*filters, f"{frames}concat=n={len(timestamps)}:v=1:a=0"])],
             *["-v", "quiet"],
-            *["-of", "csv=p=0"],
+            *["-f", "rawvideo", "-"],
         ],
         capture_output=True,
-        text=True,
         check=True,
     )
-    return result.stdout.strip()
+    frame_size = FRAME_HASH_WIDTH * FRAME_HASH_HEIGHT
+    if len(result.stdout) != len(timestamps) * frame_size:
+        msg = f"Expected {len(timestamps)} frame(s) from '{video.name}', got {len(result.stdout) / frame_size:g}"
+        raise ValueError(msg)
+
+    hashes = []
+    for frame_start in range(0, len(result.stdout), frame_size):
+        pixels = result.stdout[frame_start : frame_start + frame_size]
+        frame_hash = 0
+        for row in range(0, frame_size, FRAME_HASH_WIDTH):
+            for column in range(row, row + FRAME_HASH_WIDTH - 1):
+                frame_hash = (frame_hash << 1) | (pixels[column] > pixels[column + 1])
+        hashes.append(frame_hash)
+    return hashes
 
 
 def shorten_path(file_path: Path, length: int) -> Path:
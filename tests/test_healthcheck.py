@@ -0,0 +1,133 @@
+import re
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from nano_encoder.commands import healthcheck
+from nano_encoder.commands.healthcheck import (
+    FRAME_HASH_SAMPLES,
+    HealthArgs,
+    HealthChecker,
+    SsimCache,
+    build_ssim_filtergraph,
+)
+
+
+def parse_filter_names(filtergraph: str) -> list[str]:
+    """Return the name of each filter in a filtergraph, in the order ffmpeg parses (and numbers) them."""
+    return [
+        re.sub(r"\[[^\]]*\]", "", link).split("=", 1)[0]
+        for chain in filtergraph.split(";")
+        for link in chain.split(",")
+    ]
+
+
+@pytest.mark.parametrize("fast", [False, True])
+@pytest.mark.parametrize("pair_count", [1, 2, 8])
+def test_ssim_filter_indexes_point_at_each_pairs_ssim_filter(pair_count: int, *, fast: bool) -> None:
+    filtergraph, ssim_filter_indexes = build_ssim_filtergraph(pair_count, fast=fast)
+
+    filter_names = parse_filter_names(filtergraph)
+    assert ssim_filter_indexes == [index for index, name in enumerate(filter_names) if name == "ssim"]
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_ssim_filtergraph_reads_inputs_in_pair_order(*, fast: bool) -> None:
+    filtergraph, _ = build_ssim_filtergraph(3, fast=fast)
+
+    input_labels = re.findall(r"\[(\d+):v\]", filtergraph)
+    assert input_labels == [str(index) for index in range(6)]
+
+
+def test_ssim_cache_round_trip(tmp_path: Path) -> None:
+    database = tmp_path / "ssim_cache.sqlite3"
+    original, optimized = Path("movie.mp4"), Path("movie.optimized.mp4")
+
+    cache = SsimCache(database)
+    assert cache.get(original, optimized, fast=False, signature="1:1:1:1") is None
+    cache.set(original, optimized, fast=False, signature="1:1:1:1", score=0.991)
+    cache.set(original, optimized, fast=True, signature="1:1:1:1", score=0.985)
+    assert cache.get(original, optimized, fast=False, signature="1:1:1:1") == pytest.approx(0.991)
+    assert cache.get(original, optimized, fast=True, signature="1:1:1:1") == pytest.approx(0.985)
+    # Either file changing invalidates the score
+    assert cache.get(original, optimized, fast=False, signature="2:1:1:1") is None
+    cache.close()
+
+    cache = SsimCache(database)
+    assert cache.get(original, optimized, fast=False, signature="1:1:1:1") == pytest.approx(0.991)
+    cache.set(original, optimized, fast=False, signature="2:2:2:2", score=0.95)
+    assert cache.get(original, optimized, fast=False, signature="1:1:1:1") is None
+    assert cache.get(original, optimized, fast=False, signature="2:2:2:2") == pytest.approx(0.95)
+    cache.close()
+
+
+def test_ssim_cache_signature_tracks_size_and_mtime(tmp_path: Path) -> None:
+    original = tmp_path / "movie.mp4"
+    optimized = tmp_path / "movie.optimized.mp4"
+    original.write_bytes(b"original")
+    optimized.write_bytes(b"optimized")
+
+    signature = SsimCache.signature(original.stat(), optimized.stat())
+    optimized.write_bytes(b"re-encoded")
+
+    assert SsimCache.signature(original.stat(), optimized.stat()) != signature
+
+
+@pytest.fixture
+def video_pair(tmp_path: Path) -> tuple[Path, Path]:
+    original, optimized = tmp_path / "movie.mp4", tmp_path / "movie.optimized.mp4"
+    original.write_bytes(b"original")
+    optimized.write_bytes(b"optimized")
+    return original, optimized
+
+
+def prefilter_checker(directory: Path, monkeypatch: pytest.MonkeyPatch, optimized_hashes: list[int]) -> HealthChecker:
+    """Create a health checker with a frame hash prefilter distance of 2, hashing frames to the given values."""
+
+    def frame_hashes(video: Path, timestamps: list[float]) -> list[int]:
+        assert len(timestamps) == FRAME_HASH_SAMPLES
+        return optimized_hashes if ".optimized" in video.name else [0] * FRAME_HASH_SAMPLES
+
+    monkeypatch.setattr(healthcheck, "get_video_duration", lambda _video: 60.0)
+    monkeypatch.setattr(healthcheck, "get_frame_hashes", frame_hashes)
+    return HealthChecker(HealthArgs(directory, hash_prefilter=2, scan_workers=1, use_cache=False))
+
+
+def test_frames_within_prefilter_distance_skip_ssim(
+    video_pair: tuple[Path, Path],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    original, optimized = video_pair
+    # The largest distance of any sampled frame counts, here exactly the limit
+    checker = prefilter_checker(original.parent, monkeypatch, [0b11, 0b1, 0, 0, 0])
+
+    assert checker._frames_match(original, optimized)
+    assert checker.health_table.row_count == 1
+
+
+def test_frames_over_prefilter_distance_need_ssim(
+    video_pair: tuple[Path, Path],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    original, optimized = video_pair
+    checker = prefilter_checker(original.parent, monkeypatch, [0, 0, 0b111, 0, 0])
+
+    assert not checker._frames_match(original, optimized)
+    assert checker.health_table.row_count == 0
+
+
+def test_pairs_that_cannot_be_hashed_fall_back_to_ssim(
+    video_pair: tuple[Path, Path],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    original, optimized = video_pair
+    checker = prefilter_checker(original.parent, monkeypatch, [0] * FRAME_HASH_SAMPLES)
+
+    def fail_to_hash(video: Path, _timestamps: list[float]) -> list[int]:
+        raise subprocess.CalledProcessError(1, ["ffmpeg", "-i", str(video)])
+
+    monkeypatch.setattr(healthcheck, "get_frame_hashes", fail_to_hash)
+
+    assert not checker._frames_match(original, optimized)
+    assert checker.health_table.row_count == 0
@@ -0,0 +1,87 @@
+import io
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+import pytest
+
+from nano_encoder.commands.optimize import OptimizeArgs, OptimizeDirectory, VideoOptimizer
+from nano_encoder.utils import VideoScan
+
+
+def make_hardlinked_videos(root: Path) -> Path:
+    """
+    Create a video hardlinked under two more names, next to an unrelated video.
+
+    Returns:
+        Path: The unrelated video
+
+    """
+    (root / "Movies").mkdir()
+    (root / "Movies" / "movie.mp4").write_bytes(b"movie")
+    (root / "Favourites").mkdir()
+    os.link(root / "Movies" / "movie.mp4", root / "Favourites" / "movie.mp4")
+    os.link(root / "Movies" / "movie.mp4", root / "movie (copy).mp4")
+    other = root / "Movies" / "other.mp4"
+    other.write_bytes(b"other")
+    return other
+
+
+def find_videos_to_optimize(directory: Path) -> list[Path]:
+    # --force skips the codec probes, leaving only the scan's own filtering
+    return OptimizeDirectory(OptimizeArgs(directory, force_encode=True, scan_workers=1)).video_files
+
+
+def test_hardlinked_videos_are_queued_once(tmp_path: Path) -> None:
+    other = make_hardlinked_videos(tmp_path)
+
+    video_files = find_videos_to_optimize(tmp_path)
+
+    assert len(video_files) == 2
+    assert other in video_files
+
+
+def test_hardlinks_are_found_when_the_listing_omits_inodes(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    other = make_hardlinked_videos(tmp_path)
+
+    def listing_stat(_scan: VideoScan, video: Path) -> os.stat_result:
+        # Like a Windows directory listing, which leaves the inode and link count at zero
+        full_stat = video.stat()
+        return os.stat_result((full_stat.st_mode, 0, full_stat.st_dev, 0, *full_stat[4:10]))
+
+    monkeypatch.setattr(VideoScan, "stat", listing_stat)
+
+    video_files = find_videos_to_optimize(tmp_path)
+
+    assert len(video_files) == 2
+    assert other in video_files
+
+
+@pytest.mark.parametrize(
+    ("ffmpeg_errors", "logged"),
+    [(b"", b""), (b"oops\n", b"\n=== Encoding: movie.mp4 ===\noops\n")],
+)
+def test_ffmpeg_errors_are_logged_only_when_present(ffmpeg_errors: bytes, logged: bytes) -> None:
+    optimizer = VideoOptimizer.__new__(VideoOptimizer)
+    optimizer.input_file = Path("movie.mp4")
+    optimizer.ffmpeg_log = io.BytesIO()
+    optimizer.ffmpeg_log_lock = threading.Lock()
+
+    with tempfile.TemporaryFile() as spooled_errors:
+        spooled_errors.write(ffmpeg_errors)
+        optimizer._append_to_ffmpeg_log(spooled_errors)
+
+    assert optimizer.ffmpeg_log.getvalue() == logged
+
+
+def test_only_dotted_tags_mark_videos_as_processed(tmp_path: Path) -> None:
+    for name in ["movie.mp4", "movie.optimized.mp4", "show.optimizing.mkv", "optimized_cut.mp4", "clip.mov"]:
+        (tmp_path / name).touch()
+
+    video_files = find_videos_to_optimize(tmp_path)
+
+    assert video_files == [tmp_path / "clip.mov", tmp_path / "optimized_cut.mp4"]
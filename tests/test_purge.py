@@ -0,0 +1,74 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from nano_encoder.commands.purge import PurgeArgs, PurgeDirectory
+
+
+def make_library(root: Path) -> tuple[list[Path], list[Path]]:
+    """
+    Create originals with and without optimized versions across several directories.
+
+    Each directory has an 'episode.mkv', so deleting relative to the wrong directory removes a file that must stay.
+
+    Returns:
+        tuple[list[Path], list[Path]]: The originals purge should delete, and every file it should keep
+
+    """
+    purged: list[Path] = []
+    kept: list[Path] = []
+    for season, optimized in [("Season 1", "episode"), ("Season 2", "pilot"), ("Season 3", "episode")]:
+        directory = root / season
+        directory.mkdir()
+        for name in ["episode.mkv", "pilot.mkv", f"{optimized}.optimized.mkv"]:
+            (directory / name).touch()
+        purged.append(directory / f"{optimized}.mkv")
+        kept += [directory / f"{optimized}.optimized.mkv"]
+        kept += [directory / name for name in ["episode.mkv", "pilot.mkv"] if name != f"{optimized}.mkv"]
+    return purged, kept
+
+
+def purge_permanently(directory: Path) -> None:
+    PurgeDirectory(PurgeArgs(directory, permanent=True, skip_confirmation=True, scan_workers=1)).execute()
+
+
+def test_permanent_purge_deletes_only_originals_with_optimized_versions(tmp_path: Path) -> None:
+    purged, kept = make_library(tmp_path)
+
+    purge_permanently(tmp_path)
+
+    assert not any(original.exists() for original in purged)
+    assert all(file.exists() for file in kept)
+
+
+@pytest.mark.skipif(os.unlink not in os.supports_dir_fd, reason="Deletions only use directory descriptors here")
+def test_permanent_purge_falls_back_to_full_paths_for_unopenable_directories(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    purged, kept = make_library(tmp_path)
+    unopenable = tmp_path / "Season 2"
+    real_open, real_unlink = os.open, os.unlink
+    unlinked: list[tuple[str, int | None]] = []
+
+    def open_directory(path: str | Path, flags: int, *args: int, **kwargs: int) -> int:
+        if Path(path) == unopenable:
+            raise PermissionError(path)
+        return real_open(path, flags, *args, **kwargs)
+
+    def record_unlink(path: str | Path, *, dir_fd: int | None = None) -> None:
+        unlinked.append((os.fspath(path), dir_fd))
+        real_unlink(path, dir_fd=dir_fd)
+
+    monkeypatch.setattr(os, "open", open_directory)
+    monkeypatch.setattr(os, "unlink", record_unlink)
+    monkeypatch.setattr(os, "supports_dir_fd", os.supports_dir_fd | {record_unlink})
+
+    purge_permanently(tmp_path)
+
+    assert not any(original.exists() for original in purged)
+    assert all(file.exists() for file in kept)
+    # Only the directory that couldn't be opened deletes by full path
+    assert sorted(path for path, dir_fd in unlinked if dir_fd is None) == [str(unopenable / "pilot.mkv")]
+    assert sorted(path for path, dir_fd in unlinked if dir_fd is not None) == ["episode.mkv", "episode.mkv"]
@@ -0,0 +1,29 @@
+from pathlib import Path
+
+import pytest
+
+from nano_encoder.commands.untag import UntagArgs, UntagDirectory
+from nano_encoder.console import console
+
+
+def test_untag_skips_videos_whose_untagged_name_appears_after_the_preview(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    (tmp_path / "show.optimized.mp4").write_bytes(b"optimized show")
+    (tmp_path / "movie.optimized.mkv").write_bytes(b"optimized movie")
+    untag = UntagDirectory(UntagArgs(tmp_path))
+
+    # The original comes back between planning the renames and running them
+    (tmp_path / "show.mp4").write_bytes(b"original show")
+    monkeypatch.setattr(console, "input", lambda _prompt: "y")
+    untag.execute()
+
+    assert (tmp_path / "show.optimized.mp4").read_bytes() == b"optimized show"
+    assert (tmp_path / "show.mp4").read_bytes() == b"original show"
+    assert (tmp_path / "movie.mkv").read_bytes() == b"optimized movie"
+    assert not (tmp_path / "movie.optimized.mkv").exists()
+    output = " ".join(capsys.readouterr().out.split())  # Undo console line wrapping
+    assert "Failed to rename 'show.optimized.mp4'" in output
+    assert "show.mp4 already exists" in output
@@ -0,0 +1,132 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from nano_encoder.utils import (
+    add_optimized_tag,
+    directory_fully_processed,
+    humanize_file_size,
+    remove_optimized_tag,
+    scan_video_files,
+)
+
+
+@pytest.mark.parametrize(
+    ("name", "tagged"),
+    [
+        ("show.mp4", "show.optimized.mp4"),
+        ("show.s01e01.mkv", "show.s01e01.optimized.mkv"),
+        ("optimized.mov", "optimized.optimized.mov"),
+    ],
+)
+def test_optimized_tag_round_trip(name: str, tagged: str) -> None:
+    assert add_optimized_tag(name) == tagged
+    assert remove_optimized_tag(tagged) == name
+
+
+def test_remove_optimized_tag_only_strips_tag_before_extension() -> None:
+    assert remove_optimized_tag("show.optimized.extended.mp4") == "show.optimized.extended.mp4"
+    assert remove_optimized_tag("show.mp4") == "show.mp4"
+
+
+@pytest.mark.parametrize(
+    ("size_bytes", "expected"),
+    [
+        (0, "0 bytes"),
+        (1, "1 bytes"),
+        (1023, "1023 bytes"),
+        (1024, "1.00 KB"),
+        (1536, "1.50 KB"),
+        (1024**2 - 1, "1024.00 KB"),
+        (1024**2, "1.00 MB"),
+        (5 * 1024**3, "5.00 GB"),
+        (1024**4, "1.00 TB"),
+        (2048 * 1024**4, "2048.00 TB"),
+    ],
+)
+def test_humanize_file_size(size_bytes: int, expected: str) -> None:
+    assert humanize_file_size(size_bytes) == expected
+
+
+def test_humanize_file_size_rejects_negative_sizes() -> None:
+    with pytest.raises(ValueError, match="negative"):
+        humanize_file_size(-1)
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_scan_video_files_classifies_by_tag(tmp_path: Path, workers: int) -> None:
+    season = tmp_path / "Season 1"
+    season.mkdir()
+    hidden = tmp_path / ".trash"
+    hidden.mkdir()
+    names = [
+        "movie.mp4",
+        "movie.optimized.mp4",
+        "Optimized Living.mkv",
+        "the.optimizedness.mov",
+        "show.optimizing.mkv",
+        "notes.txt",
+        "movie.mp4.part",
+    ]
+    for name in names:
+        (tmp_path / name).touch()
+    (season / "episode.mkv").touch()
+    (hidden / "deleted.mp4").touch()
+
+    scan = scan_video_files(tmp_path, workers)
+
+    assert sorted(scan.originals) == sorted(
+        [
+            tmp_path / "movie.mp4",
+            tmp_path / "Optimized Living.mkv",
+            tmp_path / "the.optimizedness.mov",
+            season / "episode.mkv",
+        ],
+    )
+    assert sorted(scan.optimized) == [tmp_path / "movie.optimized.mp4"]
+    assert scan.optimizing == [tmp_path / "show.optimizing.mkv"]
+    assert scan.optimized_version(tmp_path / "movie.mp4") == tmp_path / "movie.optimized.mp4"
+    assert scan.optimized_version(season / "episode.mkv") is None
+
+
+@pytest.mark.skipif(os.name == "nt", reason="Extensions match case-insensitively on Windows")
+def test_scan_video_files_matches_extensions_case_sensitively(tmp_path: Path) -> None:
+    (tmp_path / "upper.MP4").touch()
+    (tmp_path / "lower.mp4").touch()
+
+    scan = scan_video_files(tmp_path, workers=1)
+
+    assert scan.originals == [tmp_path / "lower.mp4"]
+
+
+def test_scan_video_files_follows_symlinked_videos_but_not_directories(tmp_path: Path) -> None:
+    library = tmp_path / "library"
+    library.mkdir()
+    elsewhere = tmp_path / "elsewhere"
+    elsewhere.mkdir()
+    (elsewhere / "movie.mp4").touch()
+    (library / "linked.mp4").symlink_to(elsewhere / "movie.mp4")
+    (library / "linked_directory").symlink_to(elsewhere, target_is_directory=True)
+
+    scan = scan_video_files(library, workers=1)
+
+    assert scan.originals == [library / "linked.mp4"]
+
+
+def test_directory_fully_processed(tmp_path: Path) -> None:
+    season = tmp_path / "Season 1"
+    season.mkdir()
+    for name in ["episode.mkv", "episode.optimized.mkv"]:
+        (season / name).touch()
+    assert directory_fully_processed(tmp_path)
+
+    # An optimized version only counts next to its original, not in another directory
+    (tmp_path / "episode.mkv").touch()
+    assert not directory_fully_processed(tmp_path)
+    (tmp_path / "episode.optimized.mkv").touch()
+    assert directory_fully_processed(tmp_path)
+
+    # Unfinished encodes count as unprocessed
+    (season / "pilot.optimizing.mkv").touch()
+    assert not directory_fully_processed(tmp_path)